@@ -0,0 +1,141 @@
+"""Token and spend accounting per research run, with budget thresholds."""
+import contextvars
+import functools
+import threading
+from collections import defaultdict
+from typing import Dict
+
+import ratelimit
+import tracing
+from config import Config
+
+_current_usage = contextvars.ContextVar("current_usage", default=None)
+_current_node = contextvars.ContextVar("current_node", default="other")
+
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """Load tiktoken's cl100k encoding once; None if tiktoken or its data is unavailable."""
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        with _encoding_lock:
+            if _encoding is None and not _encoding_failed:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception:
+                    _encoding_failed = True
+    return _encoding
+
+
+def count_tokens(content) -> int:
+    """Count tokens in a string, a list of chat messages or a list of strings."""
+    if isinstance(content, (list, tuple)):
+        return sum(count_tokens(m.get("content", "") if isinstance(m, dict) else m) + 4
+                   for m in content)
+    text = content or ""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def call_cost(provider: str, input_tokens: int, output_tokens: int) -> float:
+    """USD cost of one call from the Config.PRICING table (per 1M tokens)."""
+    input_price, output_price = Config.PRICING.get(provider, (0.0, 0.0))
+    cost = (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+    if provider == "perplexity":
+        cost += Config.PERPLEXITY_REQUEST_FEE
+    return cost
+
+
+class RunUsage:
+    """Thread-safe token and cost totals for one research run, by node and provider."""
+
+    def __init__(self, budget: float = None, initial: Dict = None):
+        self.budget = Config.DEFAULT_BUDGET if budget is None else budget
+        self._lock = threading.Lock()
+        self._rows = defaultdict(lambda: {"calls": 0, "cached_calls": 0, "input_tokens": 0,
+                                          "output_tokens": 0, "cost": 0.0})
+        for row in (initial or {}).get("by_node", []):
+            self._rows[(row["node"], row["provider"])].update(
+                {k: row[k] for k in ("calls", "cached_calls", "input_tokens", "output_tokens", "cost")}
+            )
+
+    def record(self, provider: str, input_tokens: int, output_tokens: int,
+               node: str = None, cached: bool = False):
+        node = node or _current_node.get()
+        cost = 0.0 if cached else call_cost(provider, input_tokens, output_tokens)
+        with self._lock:
+            row = self._rows[(node, provider)]
+            row["calls"] += 1
+            if cached:
+                row["cached_calls"] += 1
+            else:
+                row["input_tokens"] += input_tokens
+                row["output_tokens"] += output_tokens
+                row["cost"] += cost
+
+    @property
+    def spent(self) -> float:
+        with self._lock:
+            return sum(row["cost"] for row in self._rows.values())
+
+    def fraction_used(self) -> float:
+        return self.spent / self.budget if self.budget else 0.0
+
+    def over_soft_limit(self) -> bool:
+        """Past the point where queries and prompt context are cut back."""
+        return self.fraction_used() >= Config.BUDGET_SOFT_LIMIT
+
+    def snapshot(self) -> Dict:
+        """JSON-serializable totals for storing in the research state."""
+        with self._lock:
+            rows = [dict(node=node, provider=provider, **row)
+                    for (node, provider), row in sorted(self._rows.items())]
+        return {
+            "budget": self.budget,
+            "spent": round(sum(r["cost"] for r in rows), 6),
+            "input_tokens": sum(r["input_tokens"] for r in rows),
+            "output_tokens": sum(r["output_tokens"] for r in rows),
+            "by_node": rows,
+        }
+
+
+def start_run(budget: float = None, initial: Dict = None) -> RunUsage:
+    """Create the usage tracker for the current run and bind it to this context."""
+    usage = RunUsage(budget, initial)
+    _current_usage.set(usage)
+    return usage
+
+
+def current_usage() -> RunUsage:
+    """The active run's tracker, or a detached unlimited one outside a run."""
+    usage = _current_usage.get()
+    if usage is None:
+        usage = RunUsage(budget=0)
+        _current_usage.set(usage)
+    return usage
+
+
+def record(provider: str, input_tokens: int, output_tokens: int, cached: bool = False):
+    """Record one provider call against the active run and its open trace span."""
+    current_usage().record(provider, input_tokens, output_tokens, cached=cached)
+    if not cached:
+        ratelimit.report_usage(input_tokens, output_tokens)
+    tracing.annotate(input_tokens=input_tokens, output_tokens=output_tokens)
+
+
+def metered(name: str, node_fn):
+    """Wrap a graph node so provider calls made inside it are attributed to `name`."""
+    @functools.wraps(node_fn)
+    def wrapper(state):
+        token = _current_node.set(name)
+        try:
+            return node_fn(state)
+        finally:
+            _current_node.reset(token)
+    return wrapper
@@ -1,17 +1,46 @@
 """LangGraph-based research workflow with iterative deepening."""
+import contextvars
+import functools
 import json
-from typing import TypedDict
-from langgraph.graph import StateGraph, END
+import operator
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Annotated, Dict, List, TypedDict
+import accounting
+import checkpoints
+import events
+import tracing
+from config import Config
 from models import models
-from tools import batch_search, format_search_results
+from tools import batch_search, dedupe_queries
+from findings import new_findings, render_findings
+from retrieval import chunk_records, pack_context
 from prompts import (
     format_query_generation_prompt, format_risk_analysis_prompt,
     format_entity_extraction_prompt, format_report_prompt
 )
 
 
+class ResearchCancelled(Exception):
+    """Raised between nodes when the run's cancel event has been set."""
+
+
+class ReportFailed(Exception):
+    """Raised by report_node when no report could be generated, so the run stays resumable."""
+
+
+_cancel_event = contextvars.ContextVar("cancel_event", default=None)
+
+
 class ResearchState(TypedDict):
-    """State object passed between workflow nodes."""
+    """State object passed between workflow nodes.
+    
+    Nodes return only the keys they update. `findings` is append-only: each
+    search contributes its new source records through the list reducer.
+    """
     target: str
     context: str
     focus: str
@@ -20,11 +49,25 @@ class ResearchState(TypedDict):
     location: str
     depth: int
     max_depth: int
-    all_findings: str
+    findings: Annotated[List[Dict], operator.add]
+    executed_queries: Annotated[List[str], operator.add]
+    queries_skipped: int
+    searches_succeeded: int
+    search_failed: bool
     entities: str
+    extracted_upto: int
     risk_analysis: str
     final_report: str
+    error: str
     num_sources: int
+    completed_depth: int
+    budget: float
+    usage: Dict
+    stop_reason: str
+    depth_yield: Annotated[List[Dict], operator.add]
+    trace_file: str
+    run_id: str
+    analysis_nodes: List[str]
 
 
 def _clean_json_response(response):
@@ -39,16 +82,97 @@ def _clean_json_response(response):
     return response.strip()
 
 
-def search_node(state: ResearchState) -> ResearchState:
+# Identity of an entity within each extracted category, used to merge depths
+ENTITY_KEYS = {
+    "people": ("name",),
+    "organizations": ("name",),
+    "locations": ("place",),
+    "timeline": ("date", "event"),
+    "financial": ("amount", "context"),
+    "legal": ("type", "description"),
+}
+QUERY_CONTEXT_CHARS = 8000
+
+# Prompt token budgets for findings; risk and report pack the most relevant
+# records for their task instead of the most recent ones
+EXTRACT_CHUNK_TOKENS = 2000
+RISK_CONTEXT_TOKENS = 2500
+REPORT_CONTEXT_TOKENS = 6250
+
+RISK_TASK = ("fraud lawsuit litigation criminal charges indictment conviction investigation "
+             "regulator SEC DOJ fine penalty settlement bankruptcy debt scandal controversy "
+             "misconduct sanctions allegations associates partners")
+REPORT_TASK = ("biography education career founded CEO board timeline company investors funding "
+               "financial legal lawsuit charges conviction investigation controversy associates "
+               "reputation current status")
+
+# Streamed report text is batched into one report_chunk event per interval
+REPORT_CHUNK_SECONDS = 0.25
+
+
+def _context_budget(tokens):
+    """Shrink prompt context once the run is past the soft spend limit."""
+    return tokens // 2 if accounting.current_usage().over_soft_limit() else tokens
+
+
+def _task_query(state, task):
+    """Relevance query for a node: its task terms plus the target and focus areas."""
+    return " ".join((state['target'], state.get('focus', ''), task))
+
+
+def _normalize_name(value):
+    """Lowercase, drop punctuation and collapse whitespace for dedup keys."""
+    return " ".join(re.sub(r"[^\w\s]", " ", str(value or "")).lower().split())
+
+
+def _load_entities(entities_json):
+    """Parse the stored entity set, ignoring error markers and raw text."""
+    try:
+        entities = json.loads(entities_json or "{}")
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(entities, dict) or "error" in entities:
+        return {}
+    return entities
+
+
+def _merge_entities(existing, new):
+    """Merge newly extracted entities into the persistent set, deduplicating by key."""
+    merged = {category: list(existing.get(category, [])) for category in ENTITY_KEYS}
+    added = 0
+    for category, fields in ENTITY_KEYS.items():
+        index = {
+            tuple(_normalize_name(item.get(f)) for f in fields): item
+            for item in merged[category] if isinstance(item, dict)
+        }
+        for item in new.get(category, []) or []:
+            if not isinstance(item, dict):
+                continue
+            key = tuple(_normalize_name(item.get(f)) for f in fields)
+            if not any(key):
+                continue
+            if key in index:
+                # Fill in details the earlier depth did not have
+                for field, value in item.items():
+                    if value and not index[key].get(field):
+                        index[key][field] = value
+            else:
+                index[key] = item
+                merged[category].append(item)
+                added += 1
+    return merged, added
+
+
+def search_node(state: ResearchState) -> dict:
     """Generate queries via GPT-4, execute via Perplexity."""
-    state['depth'] = state.get('depth', 0) + 1
+    depth = state.get('depth', 0) + 1
     print(f"\n{'='*60}")
-    print(f"SEARCH - Depth {state['depth']}/{state['max_depth']}")
+    print(f"SEARCH - Depth {depth}/{state['max_depth']}")
     print(f"{'='*60}")
     
     messages = format_query_generation_prompt(
-        target=state['target'], depth=state['depth'],
-        previous_findings=state.get('all_findings', ''),
+        target=state['target'], depth=depth,
+        previous_findings=render_findings(state.get('findings', []), max_chars=QUERY_CONTEXT_CHARS),
         context=state.get('context', ''), focus=state.get('focus', ''),
         time_period=state.get('time_period', ''), industry=state.get('industry', ''),
         location=state.get('location', '')
@@ -58,7 +182,8 @@ def search_node(state: ResearchState) -> ResearchState:
     query_response = models.gpt4_call(messages, temperature=0.7, max_tokens=1000)
     
     if not query_response:
-        return state
+        print("Query generation failed, no searches run at this depth")
+        return {"depth": depth, "searches_succeeded": 0, "search_failed": True}
     
     try:
         queries = json.loads(_clean_json_response(query_response))
@@ -72,78 +197,152 @@ def search_node(state: ResearchState) -> ResearchState:
             f"{state['target']} news recent developments"
         ]
     
+    if accounting.current_usage().over_soft_limit() and len(queries) > Config.BUDGET_REDUCED_QUERIES:
+        print(f"Budget {accounting.current_usage().fraction_used():.0%} used, "
+              f"limiting to {Config.BUDGET_REDUCED_QUERIES} queries")
+        queries = queries[:Config.BUDGET_REDUCED_QUERIES]
+    
+    queries, skipped = dedupe_queries(queries, state.get('executed_queries', []), state['target'])
+    queries_skipped = state.get('queries_skipped', 0) + len(skipped)
+    if skipped:
+        print(f"Skipped {len(skipped)} near-duplicate queries: {skipped}")
+    events.emit("queries", depth=depth, queries=queries, skipped=skipped)
+    
     print("Executing searches...")
-    search_results = batch_search(queries, max_results_per_query=3)
+    search_results = batch_search(queries, max_results_per_query=3) if queries else {}
     
-    formatted_results = []
-    for query, results in search_results.items():
-        formatted_results.append(f"\n[Query: {query}]")
-        formatted_results.append(format_search_results(results))
+    # Only queries that returned something count as executed; failed ones may be retried later
+    succeeded = [q for q in queries
+                 if any(r.get("url") != "error" for r in search_results.get(q, []))]
+    if len(succeeded) < len(queries):
+        print(f"{len(queries) - len(succeeded)} searches failed and will not be recorded as executed")
     
-    state['all_findings'] = state.get('all_findings', '') + "\n\n" + "\n".join(formatted_results)
-    state['num_sources'] = state.get('num_sources', 0) + sum(len(r) for r in search_results.values())
-    print(f"Total sources: {state['num_sources']}")
+    records = new_findings(state.get('findings', []), search_results, depth)
+    num_sources = state.get('num_sources', 0) + len(records)
+    print(f"New sources: {len(records)}, total sources: {num_sources}")
+    events.emit("sources", depth=depth, new_sources=len(records), total_sources=num_sources)
     
-    return state
+    return {"depth": depth, "findings": records, "num_sources": num_sources,
+            "executed_queries": succeeded, "queries_skipped": queries_skipped,
+            "searches_succeeded": len(succeeded), "search_failed": bool(queries) and not succeeded}
 
 
-def extract_node(state: ResearchState) -> ResearchState:
-    """Extract entities and timeline via Gemini."""
+def extract_node(state: ResearchState) -> dict:
+    """Extract entities and timeline via Gemini. Runs in parallel with risk_node.
+    
+    Only source records added since the previous depth are sent; the results are
+    merged into the entity set accumulated over earlier depths.
+    """
     print(f"\n{'='*60}")
     print("EXTRACT - Entity & Timeline Extraction")
     print(f"{'='*60}")
     
-    prompt = format_entity_extraction_prompt(
-        target=state['target'], findings=state['all_findings'][-8000:]
-    )
+    findings = state.get('findings', [])
+    delta = findings[state.get('extracted_upto', 0):]
+    entities = _load_entities(state.get('entities'))
     
-    print("Extracting entities...")
-    entity_response = models.gemini_call(prompt, temperature=0.3, max_tokens=2000)
+    if not delta:
+        print("No new findings since last extraction")
+        return {"extracted_upto": len(findings)}
     
-    if not entity_response:
-        state['entities'] = json.dumps({"error": "Extraction failed"})
-        return state
-    
-    try:
-        entities = json.loads(_clean_json_response(entity_response))
-        state['entities'] = json.dumps(entities, indent=2)
-        print(f"Extracted: {len(entities.get('people', []))} people, "
-              f"{len(entities.get('organizations', []))} orgs, "
-              f"{len(entities.get('timeline', []))} events")
-    except json.JSONDecodeError:
-        state['entities'] = entity_response
+    print(f"Extracting entities from {len(delta)} new sources...")
+    added = 0
+    for chunk in chunk_records(delta, EXTRACT_CHUNK_TOKENS):
+        prompt = format_entity_extraction_prompt(
+            target=state['target'], findings=render_findings(chunk)
+        )
+        entity_response = models.gemini_call(prompt, temperature=0.3, max_tokens=2000)
+        try:
+            new_entities = json.loads(_clean_json_response(entity_response or ""))
+        except json.JSONDecodeError:
+            new_entities = None
+        
+        if not isinstance(new_entities, dict):
+            # Leave the cursor where it was so the next depth retries this text
+            if not entities:
+                return {"entities": json.dumps({"error": "Extraction failed"})}
+            return {"entities": json.dumps(entities, indent=2)}
+        
+        entities, chunk_added = _merge_entities(entities, new_entities)
+        added += chunk_added
     
-    return state
+    print(f"Extracted {added} new entities. Total: {len(entities.get('people', []))} people, "
+          f"{len(entities.get('organizations', []))} orgs, "
+          f"{len(entities.get('timeline', []))} events")
+    events.emit("entities", new=added, people=len(entities.get('people', [])),
+                organizations=len(entities.get('organizations', [])),
+                events=len(entities.get('timeline', [])))
+    return {"entities": json.dumps(entities, indent=2), "extracted_upto": len(findings)}
 
 
-def risk_node(state: ResearchState) -> ResearchState:
-    """Analyze risks across 6 categories via Claude."""
+def risk_node(state: ResearchState) -> dict:
+    """Analyze risks across 6 categories via Claude. Runs in parallel with extract_node."""
     print(f"\n{'='*60}")
     print("RISK - Multi-Category Analysis")
     print(f"{'='*60}")
     
     system_prompt, user_prompt = format_risk_analysis_prompt(
-        target=state['target'], findings=state['all_findings'][-10000:]
+        target=state['target'],
+        findings=pack_context(state.get('findings', []),
+                              _task_query(state, RISK_TASK), _context_budget(RISK_CONTEXT_TOKENS))
     )
     
     print("Analyzing risks...")
     risk_response = models.claude_call(system_prompt, user_prompt, temperature=0.3, max_tokens=3000)
     
     if not risk_response:
-        state['risk_analysis'] = json.dumps({"error": "Analysis failed"})
-        return state
+        return {"risk_analysis": json.dumps({"error": "Analysis failed"})}
     
     try:
         risk_data = json.loads(_clean_json_response(risk_response))
-        state['risk_analysis'] = json.dumps(risk_data, indent=2)
         print(f"Total Risk Score: {risk_data.get('total_risk_score', 0)}/100")
+        events.emit("risk", depth=state['depth'], total_risk_score=risk_data.get('total_risk_score'))
+        return {"risk_analysis": json.dumps(risk_data, indent=2)}
     except json.JSONDecodeError:
-        state['risk_analysis'] = risk_response
+        return {"risk_analysis": risk_response}
+
+
+class ReportStreamer:
+    """on_chunk callback for the streamed report.
     
-    return state
+    Prints text as it arrives and emits it as `report_chunk` events, batched
+    so a long report stays within the event stream's history. A retried or
+    failed stream emits `report_chunk` with reset=True so clients drop the
+    partial text.
+    """
+    
+    def __init__(self, interval: float = REPORT_CHUNK_SECONDS):
+        self.interval = interval
+        self.streamed = False
+        self._pending = []
+        self._last_emit = time.perf_counter()
+    
+    def __call__(self, text):
+        if text is None:
+            self.reset("report stream interrupted, retrying")
+            return
+        self.streamed = True
+        print(text, end="", flush=True)
+        self._pending.append(text)
+        if time.perf_counter() - self._last_emit >= self.interval:
+            self.flush()
+    
+    def reset(self, reason: str):
+        """Discard the text streamed so far, if any."""
+        if self.streamed:
+            self._pending.clear()
+            self.streamed = False
+            print(f"\n[{reason}]")
+            events.emit("report_chunk", text="", reset=True)
+    
+    def flush(self):
+        if self._pending:
+            events.emit("report_chunk", text="".join(self._pending))
+            self._pending.clear()
+        self._last_emit = time.perf_counter()
 
 
-def report_node(state: ResearchState) -> ResearchState:
+def report_node(state: ResearchState) -> dict:
     """Synthesize final report via GPT-4."""
     print(f"\n{'='*60}")
     print("REPORT - Synthesizing Final Report")
@@ -152,47 +351,223 @@ def report_node(state: ResearchState) -> ResearchState:
     messages = format_report_prompt(
         target=state['target'], depth=state['depth'], num_sources=state['num_sources'],
         entities=state.get('entities', 'N/A'), risk_analysis=state.get('risk_analysis', 'N/A'),
-        all_findings=state['all_findings'][-25000:]
+        all_findings=pack_context(state.get('findings', []),
+                                  _task_query(state, REPORT_TASK),
+                                  _context_budget(REPORT_CONTEXT_TOKENS))
     )
     
-    print("Generating report...")
-    report = models.gpt4_call(messages, temperature=0.6, max_tokens=8000)
+    print("Generating report...\n")
+    streamer = ReportStreamer()
+    report = models.gpt4_call(messages, temperature=0.6, max_tokens=8000, on_chunk=streamer)
+    if not report:
+        streamer.reset("report stream failed")
+        events.emit("report", chars=0, error="Report generation failed")
+        if Config.CHECKPOINTS_ENABLED:
+            # Failing the node keeps the last checkpoint, so resuming re-runs only the report
+            raise ReportFailed("Report generation failed")
+        # Without checkpoints, return the research gathered so far along with the error
+        return {"final_report": "", "error": "Report generation failed",
+                "usage": accounting.current_usage().snapshot()}
     
-    state['final_report'] = report if report else "Report generation failed"
-    print(f"Report generated ({len(state['final_report'])} chars)")
+    streamer.flush()
+    if not streamer.streamed:
+        # Served from the response cache: deliver it as a single chunk
+        events.emit("report_chunk", text=report)
     
-    return state
+    print(f"\nReport generated ({len(report)} chars)")
+    events.emit("report", chars=len(report))
+    return {"final_report": report, "usage": accounting.current_usage().snapshot()}
+
+
+def _depth_yield(state: ResearchState) -> Dict:
+    """What the depth just completed added: novel URLs, new entities and risk score change.
+    
+    new_entities and risk_delta are None when there is nothing to compare
+    (extraction or risk analysis failed or did not run). search_failed is set
+    when query generation failed or every search errored.
+    """
+    depth = state['depth']
+    findings = state.get('findings', [])
+    earlier = {r['url'] for r in findings if r['depth'] < depth}
+    new_urls = {r['url'] for r in findings
+                if r['depth'] == depth and r['url'].startswith("http")} - earlier
+    
+    entities = _load_entities(state.get('entities'))
+    entity_count = (sum(len(entities.get(key) or []) for key in ENTITY_KEYS) if entities else None)
+    try:
+        risk_score = float(json.loads(state.get('risk_analysis') or "{}").get('total_risk_score'))
+    except (TypeError, ValueError, AttributeError):
+        risk_score = None
+    
+    previous = (state.get('depth_yield') or [{}])[-1]
+    prev_entities, prev_risk = previous.get('entities'), previous.get('risk_score')
+    return {
+        "depth": depth, "new_urls": len(new_urls),
+        "searches_succeeded": state.get('searches_succeeded'), "search_failed": bool(state.get('search_failed')),
+        "entities": entity_count, "risk_score": risk_score,
+        "new_entities": entity_count - (prev_entities or 0) if entity_count is not None else None,
+        "risk_delta": (round(risk_score - prev_risk, 2)
+                       if risk_score is not None and prev_risk is not None else None),
+    }
+
+
+def _converged(yield_: Dict) -> bool:
+    """True when a depth added less than every configured threshold.
+    
+    Signals that could not be measured (None) do not block convergence,
+    but a risk score seen for the first time does. A depth whose searches
+    failed found nothing because of the outage, so it never converges.
+    """
+    if not Config.ADAPTIVE_DEPTH or yield_['depth'] < Config.CONVERGENCE_MIN_DEPTH:
+        return False
+    if yield_.get('search_failed'):
+        return False
+    if yield_['new_urls'] >= Config.CONVERGENCE_MIN_NEW_URLS:
+        return False
+    if yield_['new_entities'] is not None and yield_['new_entities'] >= Config.CONVERGENCE_MIN_NEW_ENTITIES:
+        return False
+    if yield_['risk_delta'] is not None:
+        return abs(yield_['risk_delta']) < Config.CONVERGENCE_MAX_RISK_DELTA
+    return yield_['risk_score'] is None
+
+
+def join_node(state: ResearchState) -> dict:
+    """Barrier where the parallel extract and risk branches meet.
+    
+    Snapshots spend and the depth's yield into the state. Stops deepening when
+    another depth, at the average cost of the ones so far, would cross the hard
+    budget limit, or when this depth added almost nothing new (see _converged).
+    """
+    usage = accounting.current_usage()
+    snapshot = usage.snapshot()
+    yield_ = _depth_yield(state)
+    update = {"completed_depth": state['depth'], "usage": snapshot, "depth_yield": [yield_]}
+    print(f"Spend so far: ${snapshot['spent']:.2f} of ${usage.budget:.2f} "
+          f"({snapshot['input_tokens']} in / {snapshot['output_tokens']} out tokens)")
+    print(f"Depth yield: {yield_['new_urls']} new URLs, {yield_['new_entities']} new entities, "
+          f"risk score change {yield_['risk_delta']}")
+    if yield_['search_failed']:
+        print("Searches failed at this depth; not counted towards convergence")
+    events.emit("depth_completed", depth=state['depth'], max_depth=state.get('max_depth', 3),
+                sources=state.get('num_sources', 0), spent=snapshot['spent'],
+                new_urls=yield_['new_urls'], new_entities=yield_['new_entities'],
+                risk_delta=yield_['risk_delta'], search_failed=yield_['search_failed'])
+    
+    if state['depth'] >= state.get('max_depth', 3):
+        return update
+    if usage.budget:
+        per_depth = snapshot['spent'] / max(state['depth'], 1)
+        if snapshot['spent'] + per_depth > usage.budget * Config.BUDGET_HARD_LIMIT:
+            print("Budget limit reached, skipping remaining depths")
+            update["stop_reason"] = "budget"
+            return update
+    if _converged(yield_):
+        print("Research converged: this depth added little new information, skipping remaining depths")
+        update["stop_reason"] = "converged"
+    return update
 
 
 def should_continue(state: ResearchState) -> str:
     """Decide whether to loop or proceed to final report."""
-    if state.get('depth', 0) < state.get('max_depth', 3):
+    if not state.get('stop_reason') and state.get('depth', 0) < state.get('max_depth', 3):
         print(f"\nContinuing to depth {state['depth'] + 1}...")
         return "continue"
     print("\nProceeding to final report...")
     return "report"
 
 
-def create_research_graph():
-    """Build the LangGraph workflow: search → extract → risk → (loop or report)."""
+def _node(name, node_fn):
+    """Wrap a node with spend attribution, tracing, progress events and a cancellation check."""
+    metered = accounting.metered(name, node_fn)
+    
+    @functools.wraps(node_fn)
+    def wrapper(state):
+        cancel_event = _cancel_event.get()
+        if cancel_event is not None and cancel_event.is_set():
+            raise ResearchCancelled(f"Cancelled before {name}")
+        events.emit("node_started", node=name, depth=state.get('depth', 0))
+        start = time.perf_counter()
+        with tracing.span("node", name):
+            update = metered(state)
+            depth = update.get('depth', state.get('depth', 0))
+            tracing.annotate(depth=depth)
+        events.emit("node_completed", node=name, depth=depth,
+                    seconds=round(time.perf_counter() - start, 3))
+        return update
+    return wrapper
+
+
+# Per-depth analysis nodes that fan out from search; a run may enable a subset
+ANALYSIS_NODES = ("extract", "risk")
+_ANALYSIS_FUNCTIONS = {"extract": extract_node, "risk": risk_node}
+
+_compiled_graphs = {}
+_compiled_graphs_lock = threading.Lock()
+
+
+def create_research_graph(analysis_nodes=ANALYSIS_NODES, checkpointer=None):
+    """Build the LangGraph workflow: search → (extract ∥ risk) → join → (loop or report).
+    
+    extract and risk only read the findings, so they fan out from search and
+    run concurrently. Each returns just the key it owns, so their updates
+    merge without clobbering each other. With a `checkpointer`, state is saved
+    after every step under the run's thread id.
+    """
+    from langgraph.graph import StateGraph, END
+    
+    analysis_nodes = [name for name in ANALYSIS_NODES if name in analysis_nodes]
     workflow = StateGraph(ResearchState)
-    workflow.add_node("search", search_node)
-    workflow.add_node("extract", extract_node)
-    workflow.add_node("risk", risk_node)
-    workflow.add_node("report", report_node)
+    workflow.add_node("search", _node("search", search_node))
+    for name in analysis_nodes:
+        workflow.add_node(name, _node(name, _ANALYSIS_FUNCTIONS[name]))
+    workflow.add_node("join", _node("join", join_node))
+    workflow.add_node("report", _node("report", report_node))
     
     workflow.set_entry_point("search")
-    workflow.add_edge("search", "extract")
-    workflow.add_edge("extract", "risk")
-    workflow.add_conditional_edges("risk", should_continue, {"continue": "search", "report": "report"})
+    for name in analysis_nodes:
+        workflow.add_edge("search", name)
+    workflow.add_edge(analysis_nodes or "search", "join")
+    workflow.add_conditional_edges("join", should_continue, {"continue": "search", "report": "report"})
     workflow.add_edge("report", END)
     
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def get_research_graph(analysis_nodes=ANALYSIS_NODES, durable: bool = None):
+    """Compiled workflow for this variant, built once per process and shared.
+    
+    Compiled graphs hold no per-run state (depth limits, budget and inputs
+    all live in the state passed to invoke, checkpoints are keyed by run id),
+    so concurrent runs can share one. `durable` (default:
+    Config.CHECKPOINTS_ENABLED) compiles it with the SQLite checkpointer.
+    """
+    durable = Config.CHECKPOINTS_ENABLED if durable is None else durable
+    key = (frozenset(analysis_nodes), durable)
+    graph = _compiled_graphs.get(key)
+    if graph is None:
+        with _compiled_graphs_lock:
+            graph = _compiled_graphs.get(key)
+            if graph is None:
+                graph = create_research_graph(
+                    analysis_nodes, checkpoints.get_checkpointer() if durable else None)
+                _compiled_graphs[key] = graph
+    return graph
 
 
 def run_research(target: str, max_depth: int = 3, context: str = '', focus: str = '',
-                 time_period: str = '', industry: str = '', location: str = '') -> dict:
-    """Execute the full research workflow and return final state."""
+                 time_period: str = '', industry: str = '', location: str = '',
+                 budget: float = None, cancel_event: threading.Event = None,
+                 trace_path: str = None, analysis_nodes=ANALYSIS_NODES, run_id: str = None) -> dict:
+    """Execute the full research workflow and return final state.
+    
+    `budget` is the spend cap in USD for this run (defaults to Config.DEFAULT_BUDGET).
+    Setting `cancel_event` stops the run before its next node and raises ResearchCancelled.
+    Spans for every node, LLM call and search are written as JSON lines to `trace_path`
+    (default: a timestamped file in Config.LOGS_DIR). `analysis_nodes` selects which
+    of extract and risk run at each depth. With checkpoints enabled, a run that
+    fails or is cancelled can be continued with resume_research(run_id); `run_id`
+    defaults to a new random id and is returned in the state.
+    """
     print(f"\n{'#'*60}")
     print(f"DEEP RESEARCH AGENT")
     print(f"Target: {target}")
@@ -201,23 +576,103 @@ def run_research(target: str, max_depth: int = 3, context: str = '', focus: str
     print(f"Max Depth: {max_depth}")
     print(f"{'#'*60}\n")
     
+    Config.validate()
+    Config.setup_directories()
+    usage = accounting.start_run(budget)
+    run_id = run_id or new_run_id()
+    trace_path = trace_path or _default_trace_path(target)
     initial_state = {
         "target": target, "context": context, "focus": focus, "time_period": time_period,
         "industry": industry, "location": location, "depth": 0, "max_depth": max_depth,
-        "all_findings": "", "entities": "", "risk_analysis": "", "final_report": "", "num_sources": 0
+        "findings": [], "executed_queries": [], "queries_skipped": 0,
+        "entities": "", "extracted_upto": 0, "risk_analysis": "", "final_report": "",
+        "error": "", "num_sources": 0, "completed_depth": 0,
+        "budget": usage.budget, "usage": usage.snapshot(), "stop_reason": "", "depth_yield": [],
+        "searches_succeeded": 0, "search_failed": False,
+        "trace_file": str(trace_path), "run_id": run_id,
+        "analysis_nodes": [name for name in ANALYSIS_NODES if name in analysis_nodes]
     }
+    return _invoke(initial_state, initial_state, cancel_event, trace_path)
+
+
+def resume_research(run_id: str, cancel_event: threading.Event = None, trace_path: str = None) -> dict:
+    """Continue a checkpointed run from its last completed step and return final state.
+    
+    Work already checkpointed (searches, analysis and their spend) is not
+    repeated; the run keeps its original inputs, depth limit and budget.
+    Raises KeyError when no checkpoint exists for `run_id`.
+    """
+    Config.validate()
+    Config.setup_directories()
+    saved = checkpoints.load_state(run_id) if Config.CHECKPOINTS_ENABLED else None
+    if not saved:
+        raise KeyError(f"No checkpoint for run {run_id}")
+    
+    print(f"\n{'#'*60}")
+    print(f"DEEP RESEARCH AGENT (resuming run {run_id})")
+    print(f"Target: {saved['target']}")
+    print(f"Completed Depth: {saved.get('completed_depth', 0)} of {saved['max_depth']}")
+    print(f"{'#'*60}\n")
+    
+    accounting.start_run(saved.get("budget"), initial=saved.get("usage"))
+    trace_path = trace_path or _default_trace_path(saved["target"])
+    return _invoke(None, saved, cancel_event, trace_path)
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def _default_trace_path(target: str):
+    safe_name = "".join(c if c.isalnum() else "_" for c in target)
+    return Config.LOGS_DIR / f"{safe_name}_{datetime.now():%Y%m%d_%H%M%S}.trace.jsonl"
+
+
+def _invoke(graph_input, state: dict, cancel_event, trace_path) -> dict:
+    """Run (graph_input is the initial state) or resume (None) the graph for state's run.
+    
+    Returns the final state. When the run fails, returns the last checkpointed
+    state (or `state`) with an empty final_report and the failure in `error`.
+    Checkpoints of a failed or cancelled run are kept for resuming; those of a
+    run that produced its report are dropped unless Config.CHECKPOINT_KEEP_COMPLETED is set.
+    """
+    run_id = state["run_id"]
+    _cancel_event.set(cancel_event)
+    tracer = tracing.start(trace_path)
+    durable = Config.CHECKPOINTS_ENABLED
+    config = {"recursion_limit": 100, **(checkpoints.run_config(run_id) if durable else {})}
     
     try:
-        graph = create_research_graph()
-        final_state = graph.invoke(initial_state, {"recursion_limit": 100})
+        graph = get_research_graph(state.get("analysis_nodes", ANALYSIS_NODES), durable)
+        with tracing.span("run", "research", target=state["target"], max_depth=state["max_depth"],
+                          run_id=run_id, resumed=graph_input is None):
+            final_state = graph.invoke(graph_input, config)
+        if durable and final_state.get("final_report") and not Config.CHECKPOINT_KEEP_COMPLETED:
+            checkpoints.delete_run(run_id)
         
         print(f"\n{'#'*60}")
         print("RESEARCH COMPLETE")
         print(f"{'#'*60}\n")
         
-        return final_state
+        # A resumed run traces to a new file; the saved state names the old one
+        return {**final_state, "trace_file": str(trace_path)}
+    except ResearchCancelled:
+        print("\nResearch cancelled")
+        if durable:
+            print(f"Resume with: python main.py --resume-run {run_id}")
+        raise
     except Exception as e:
         print(f"\n ERROR: {e}")
-        import traceback
-        traceback.print_exc()
-        return initial_state
+        if not isinstance(e, ReportFailed):
+            import traceback
+            traceback.print_exc()
+        saved = None
+        if durable:
+            print(f"Resume with: python main.py --resume-run {run_id}")
+            try:
+                saved = checkpoints.load_state(run_id)
+            except Exception:
+                pass
+        return {**(saved or state), "final_report": "", "error": str(e), "trace_file": str(trace_path)}
+    finally:
+        tracer.close()
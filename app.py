@@ -1,40 +1,64 @@
 """Flask web interface for the research agent."""
-from flask import Flask, render_template, request, jsonify, send_file
-from agent import run_research
+from flask import Flask, Response, render_template, request, jsonify, send_file, stream_with_context
+from agent import new_run_id, resume_research, run_research, ResearchCancelled
+from config import Config
+from jobs import JobManager, JobCancelled, QueueFull
+from storage import FileCache, ReportStore
+from presets import PresetIndex
+import checkpoints
+import runlog
+import pdf
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import threading
 import json
 from datetime import datetime
 import io
-import sys
 import os
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
+import re
 
 app = Flask(__name__)
-app.temp_reports = {}
+# Report store, PDF cache and preset index touch the disk (and presets start
+# PDF renders), so they are created on first use rather than at import
+_stores = {}
+_stores_lock = threading.RLock()  # presets put into the report store while being created
+_pdf_executor = ThreadPoolExecutor(max_workers=Config.PDF_RENDER_WORKERS, thread_name_prefix='pdf')
+_pdf_renders = {}
+_pdf_renders_lock = threading.Lock()
 
-# Ensure logs directory exists
-os.makedirs('logs', exist_ok=True)
 
-class LogCapture:
-    """Capture stdout/stderr to both console and file."""
-    def __init__(self, log_file):
-        self.log_file = log_file
-        self.terminal = sys.stdout
-        self.log = open(log_file, 'w')
-    
-    def write(self, message):
-        self.terminal.write(message)
-        self.log.write(message)
-    
-    def flush(self):
-        self.terminal.flush()
-        self.log.flush()
-    
-    def close(self):
-        self.log.close()
+def _lazy(name, factory):
+    """Return the named shared object, creating it with `factory` on first use."""
+    store = _stores.get(name)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(name)
+            if store is None:
+                store = _stores[name] = factory()
+    return store
+
+
+def get_reports() -> ReportStore:
+    """Reports available for PDF download, spilled to disk beyond the memory cap."""
+    return _lazy('reports', lambda: ReportStore(
+        Config.WEB_REPORTS_DIR,
+        memory_bytes=int(Config.REPORT_STORE_MEMORY_MB * 1024 * 1024),
+        max_files=Config.REPORT_STORE_MAX_FILES,
+        ttl=Config.REPORT_STORE_TTL_DAYS * 86400 or None
+    ))
+
+
+def get_pdf_cache() -> FileCache:
+    """Rendered PDFs by report content hash; rendering runs off the request thread."""
+    return _lazy('pdf_cache', lambda: FileCache(
+        Config.PDF_CACHE_DIR, max_bytes=int(Config.PDF_CACHE_MAX_MB * 1024 * 1024), suffix='.pdf'))
+
+
+def get_presets() -> PresetIndex:
+    """Preset reports, indexed on first use; changed files are picked up on later requests."""
+    return _lazy('presets', lambda: PresetIndex(
+        'static/presets', fallbacks=_preset_fallbacks(),
+        reload_interval=Config.PRESET_RELOAD_INTERVAL, on_load=_on_preset_loaded))
 
 # Pre-made research data
 PRESET_REPORTS = {
@@ -103,226 +127,308 @@ def index():
     return render_template('index.html')
 
 
+def _preset_fallbacks():
+    """Placeholder presets served when a preset has no report file."""
+    fallbacks = {}
+    for preset_id, preset in PRESET_REPORTS.items():
+        data = dict(preset, report_id=preset_id)
+        data['full_report_markdown'] = f"# Risk Assessment Report: {data['target']}\n\n{data['summary']}\n\n*This is a placeholder. Click 'Re-run Deep Research' to generate the full report.*"
+        fallbacks[preset_id] = data
+    return fallbacks
+
+
+def _on_preset_loaded(entry):
+    """Make a (re)loaded preset downloadable and start rendering its PDF."""
+    get_reports().put(entry.id, entry.markdown)
+    _prerender_pdf(entry.markdown)
+
+
 @app.route('/get_preset/<preset_id>')
 def get_preset(preset_id):
-    preset_file = f'static/presets/{preset_id}.json'
+    entry = get_presets().get(preset_id)
+    if entry is None:
+        return jsonify({'error': 'Preset not found'}), 404
+    
+    encoding = next((e for e in ('br', 'gzip') if e in entry.bodies and request.accept_encodings[e]), 'identity')
+    etag = entry.etags[encoding]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        # Keep the report downloadable even if the store pruned it
+        get_reports().put(preset_id, entry.markdown)
+        response = Response(entry.bodies[encoding], mimetype='application/json')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.cache_control.no_cache = True
+    return response
+
+
+def _build_result(target, final_state, report_filename, log_file):
+    """Summarize a finished research state for the web UI."""
     try:
-        with open(preset_file, 'r') as f:
-            data = json.load(f)
-            data['report_id'] = preset_id
-            # Store in temp_reports for PDF download
-            app.temp_reports[preset_id] = data.get('full_report_markdown', '')
-            return jsonify(data)
-    except FileNotFoundError:
-        # Fallback to placeholder data
-        if preset_id not in PRESET_REPORTS:
-            return jsonify({'error': 'Preset not found'}), 404
-        
-        data = PRESET_REPORTS[preset_id].copy()
-        data['full_report_markdown'] = f"# Risk Assessment Report: {data['target']}\n\n{data['summary']}\n\n*This is a placeholder. Click 'Re-run Deep Research' to generate the full report.*"
-        data['report_id'] = preset_id
-        # Store in temp_reports for PDF download
-        app.temp_reports[preset_id] = data['full_report_markdown']
-        return jsonify(data)
+        risk_data = json.loads(final_state.get('risk_analysis', '{}'))
+    except:
+        risk_data = {'total_risk_score': 'N/A'}
+    
+    try:
+        entities = json.loads(final_state.get('entities', '{}'))
+    except:
+        entities = {}
+    
+    return {
+        'success': True,
+        'target': target,
+        'risk_score': risk_data.get('total_risk_score', 'N/A'),
+        'risk_breakdown': {
+            'financial': risk_data.get('financial', {}).get('score', 'N/A'),
+            'legal': risk_data.get('legal', {}).get('score', 'N/A'),
+            'reputational': risk_data.get('reputational', {}).get('score', 'N/A'),
+            'association': risk_data.get('association', {}).get('score', 'N/A'),
+            'integrity': risk_data.get('integrity', {}).get('score', 'N/A'),
+            'operational': risk_data.get('operational', {}).get('score', 'N/A'),
+        },
+        'entities': {
+            'people': len(entities.get('people', [])),
+            'organizations': len(entities.get('organizations', [])),
+            'timeline': len(entities.get('timeline', [])),
+            'legal': len(entities.get('legal', [])),
+        },
+        'sources': final_state.get('num_sources', 0),
+        'report': final_state.get('final_report', ''),
+        'report_file': report_filename,
+        'log_file': log_file,
+        'run_id': final_state.get('run_id')
+    }
+
+
+def _run_research_job(job):
+    """Job runner: execute one research request with its output logged to a file."""
+    params = job.params
+    target = params['target']
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    # ASCII only, so the name is always accepted by the report store
+    safe_name = re.sub(r'[^A-Za-z0-9]+', '_', target).strip('_')[:80] or 'report'
+    run_name = f"{safe_name}_{timestamp}_{job.id[:8]}"
+    log_file = f"logs/{run_name}.log"
+    os.makedirs('logs', exist_ok=True)
+    
+    with open(log_file, 'w') as log:
+        token = runlog.bind(log)
+        try:
+            if params.get('resume'):
+                final_state = resume_research(params['run_id'], cancel_event=job.cancel_event,
+                                              trace_path=f"logs/{run_name}.trace.jsonl")
+            else:
+                final_state = run_research(
+                    target=target,
+                    max_depth=3,
+                    context=params.get('context', ''),
+                    focus=params.get('focus', ''),
+                    time_period=params.get('time_period', ''),
+                    industry=params.get('industry', ''),
+                    location=params.get('location', ''),
+                    cancel_event=job.cancel_event,
+                    trace_path=f"logs/{run_name}.trace.jsonl",
+                    run_id=params['run_id']
+                )
+        except ResearchCancelled:
+            raise JobCancelled()
+        finally:
+            runlog.unbind(token)
+    if final_state.get('error'):
+        # The job fails; the run's checkpoints are kept for /research/runs/<run_id>/resume
+        raise RuntimeError(final_state['error'])
+    
+    # Store report for download
+    report_filename = f"{run_name}.md"
+    get_reports().put(report_filename, final_state.get('final_report', ''))
+    _prerender_pdf(final_state.get('final_report', ''))
+    
+    print(f"✓ Execution log saved: {log_file}")
+    return _build_result(target, final_state, report_filename, log_file)
+
+
+jobs = JobManager(_run_research_job, max_workers=Config.MAX_CONCURRENT_JOBS,
+                  max_pending=Config.MAX_PENDING_JOBS)
 
 
 @app.route('/research', methods=['POST'])
 def research():
-    """Execute research and return JSON results."""
+    """Queue a research job and return its id immediately."""
+    target = request.form.get('target', '').strip()
+    if not target:
+        return jsonify({'error': 'Target name is required'}), 400
+    
+    params = {'target': target, 'run_id': new_run_id()}
+    for field in ('context', 'focus', 'time_period', 'industry', 'location'):
+        params[field] = request.form.get(field, '').strip()
+    return _submit_job(params)
+
+
+def _submit_job(params):
+    """Queue a research job; 202 with its status and result URLs."""
     try:
-        target = request.form.get('target', '').strip()
-        if not target:
-            return jsonify({'error': 'Target name is required'}), 400
-        
-        # Setup log capture
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        safe_name = "".join(c if c.isalnum() else "_" for c in target)
-        log_file = f"logs/{safe_name}_{timestamp}.log"
-        log_capture = LogCapture(log_file)
-        old_stdout = sys.stdout
-        sys.stdout = log_capture
-        
-        try:
-            final_state = run_research(
-                target=target,
-                max_depth=3,
-                context=request.form.get('context', '').strip(),
-                focus=request.form.get('focus', '').strip(),
-                time_period=request.form.get('time_period', '').strip(),
-                industry=request.form.get('industry', '').strip(),
-                location=request.form.get('location', '').strip()
-            )
-        finally:
-            sys.stdout = old_stdout
-            log_capture.close()
-        
-        # Parse risk and entity data
-        try:
-            risk_data = json.loads(final_state.get('risk_analysis', '{}'))
-        except:
-            risk_data = {'total_risk_score': 'N/A'}
-        
-        try:
-            entities = json.loads(final_state.get('entities', '{}'))
-        except:
-            entities = {}
-        
-        # Store report for download
-        report_filename = f"{safe_name}_{timestamp}.md"
-        app.temp_reports[report_filename] = final_state.get('final_report', '')
-        
-        print(f"✓ Execution log saved: {log_file}")
-        
-        return jsonify({
-            'success': True,
-            'target': target,
-            'risk_score': risk_data.get('total_risk_score', 'N/A'),
-            'risk_breakdown': {
-                'financial': risk_data.get('financial', {}).get('score', 'N/A'),
-                'legal': risk_data.get('legal', {}).get('score', 'N/A'),
-                'reputational': risk_data.get('reputational', {}).get('score', 'N/A'),
-                'association': risk_data.get('association', {}).get('score', 'N/A'),
-                'integrity': risk_data.get('integrity', {}).get('score', 'N/A'),
-                'operational': risk_data.get('operational', {}).get('score', 'N/A'),
-            },
-            'entities': {
-                'people': len(entities.get('people', [])),
-                'organizations': len(entities.get('organizations', [])),
-                'timeline': len(entities.get('timeline', [])),
-                'legal': len(entities.get('legal', [])),
-            },
-            'sources': final_state.get('num_sources', 0),
-            'report': final_state.get('final_report', ''),
-            'report_file': report_filename,
-            'log_file': log_file
-        })
-    except Exception as e:
-        if 'log_capture' in locals():
-            sys.stdout = old_stdout
-            log_capture.close()
-        return jsonify({'error': str(e)}), 500
+        job = jobs.submit(params)
+    except QueueFull as e:
+        return jsonify({'error': f'Server busy: {e}'}), 503
+    
+    body = job.to_dict()
+    body['status_url'] = f"/research/{job.id}"
+    body['result_url'] = f"/research/{job.id}/result"
+    return jsonify(body), 202
 
 
-# PDF generation helpers
+@app.route('/research/runs')
+def research_runs():
+    """List runs with checkpoints that can be resumed."""
+    if not Config.CHECKPOINTS_ENABLED:
+        return jsonify({'runs': []})
+    return jsonify({'runs': checkpoints.list_runs()})
 
-def _escape_xml(text):
-    """Escape special characters for ReportLab."""
-    if not text:
-        return text
-    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
 
+@app.route('/research/runs/<run_id>/resume', methods=['POST'])
+def research_resume(run_id):
+    """Queue a job that continues a failed or cancelled run from its last checkpoint."""
+    saved = checkpoints.load_state(run_id) if Config.CHECKPOINTS_ENABLED else None
+    if not saved:
+        return jsonify({'error': 'No checkpoint for this run'}), 404
+    active = jobs.find_active(run_id=run_id)
+    if active is not None:
+        return jsonify({**active.to_dict(), 'error': 'Run is already in progress'}), 409
+    return _submit_job({'target': saved['target'], 'run_id': run_id, 'resume': True})
 
-def _convert_bold(text):
-    """Convert markdown bold syntax to HTML tags."""
-    result = []
-    parts = text.split('**')
-    for i, part in enumerate(parts):
-        if i % 2 == 0:
-            result.append(_escape_xml(part))
-        else:
-            result.append(f'<b>{_escape_xml(part)}</b>')
-    return ''.join(result)
 
+@app.route('/research/<job_id>')
+def research_status(job_id):
+    """Report a job's status."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
 
-def _safe_paragraph(text, style):
-    """Create paragraph with fallback for malformed content."""
-    try:
-        return Paragraph(text, style)
-    except:
-        try:
-            return Paragraph(_escape_xml(text.replace('<b>', '').replace('</b>', '')), style)
-        except:
-            return Paragraph("", style)
 
+@app.route('/research/<job_id>/result')
+def research_result(job_id):
+    """Return a finished job's result; 202 while it is still queued or running."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if not job.done:
+        return jsonify(job.to_dict()), 202
+    if job.status != 'completed':
+        return jsonify({'error': job.error or f'Research {job.status}', **job.to_dict()}), 409
+    return jsonify(job.result)
 
-def _markdown_to_pdf(markdown_text):
-    """Convert markdown report to PDF buffer."""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
-    elements = []
-    
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='Title2', parent=styles['Heading1'], fontSize=24, spaceAfter=30))
-    styles.add(ParagraphStyle(name='H2', parent=styles['Heading2'], fontSize=16, spaceAfter=12, spaceBefore=12))
-    styles.add(ParagraphStyle(name='H3', parent=styles['Heading3'], fontSize=12, spaceAfter=10, spaceBefore=10, textColor=colors.grey))
-    styles.add(ParagraphStyle(name='Body2', parent=styles['Normal'], fontSize=10, spaceAfter=6, leading=14))
-    styles.add(ParagraphStyle(name='List2', parent=styles['Normal'], fontSize=10, spaceAfter=4, leftIndent=20, leading=14))
+
+@app.route('/research/<job_id>/events')
+def research_events(job_id):
+    """Stream a job's progress events as Server-Sent Events.
     
-    lines = markdown_text.split('\n')
-    i = 0
+    Reconnecting clients resume after the id in the Last-Event-ID header.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    try:
+        last_id = int(request.headers.get('Last-Event-ID', 0))
+    except ValueError:
+        last_id = 0
     
-    while i < len(lines):
-        line = lines[i].strip()
-        
-        if not line:
-            elements.append(Spacer(1, 0.1*inch))
-            i += 1
-            continue
-        
-        try:
-            if line.startswith('# '):
-                elements.append(Paragraph(_escape_xml(line[2:]), styles['Title2']))
-                elements.append(Spacer(1, 0.2*inch))
-            elif line.startswith('## '):
-                elements.append(Paragraph(_escape_xml(line[3:]), styles['H2']))
-            elif line.startswith('### '):
-                elements.append(Paragraph(_escape_xml(line[4:]), styles['H3']))
-            elif line.startswith('- ') or line.startswith('* '):
-                elements.append(_safe_paragraph('• ' + _convert_bold(line[2:]), styles['List2']))
-            elif len(line) > 2 and line[0].isdigit() and line[1] in '.):':
-                elements.append(_safe_paragraph(_convert_bold(line), styles['List2']))
-            elif line.startswith('|'):
-                # Parse markdown table
-                table_data = []
-                while i < len(lines) and lines[i].strip().startswith('|'):
-                    row = [_escape_xml(c.strip()) for c in lines[i].strip().split('|')[1:-1]]
-                    if not all('---' in c or '--' in c or c == '' for c in row):
-                        table_data.append(row)
-                    i += 1
-                if table_data and len(table_data) > 1:
-                    t = Table([[Paragraph(c, styles['Normal']) for c in r] for r in table_data])
-                    t.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-                        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                        ('FONTSIZE', (0, 0), (-1, -1), 8),
-                    ]))
-                    elements.append(t)
-                    elements.append(Spacer(1, 0.2*inch))
+    def stream():
+        for event in job.events.follow(after_id=last_id):
+            if event is None:
+                yield ": keep-alive\n\n"
                 continue
-            elif '**' in line:
-                elements.append(_safe_paragraph(_convert_bold(line), styles['Body2']))
-            else:
-                elements.append(_safe_paragraph(_escape_xml(line), styles['Body2']))
-        except:
-            pass
-        
-        i += 1
+            payload = json.dumps({'time': event['time'], **event['data']})
+            yield f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
     
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/research/<job_id>/cancel', methods=['POST'])
+@app.route('/research/<job_id>', methods=['DELETE'])
+def research_cancel(job_id):
+    """Cancel a queued job or stop a running one after its current step."""
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+
+def _pdf_key(markdown):
+    """Cache key and ETag of the PDF rendered from `markdown`."""
+    return hashlib.sha256(f"{pdf.RENDER_VERSION}\n{markdown}".encode()).hexdigest()
+
+
+def _render_pdf_cached(key, markdown):
+    try:
+        data = get_pdf_cache().get(key)
+        if data is None:
+            data = pdf.markdown_to_pdf(markdown).getvalue()
+            get_pdf_cache().put(key, data)
+        return data
+    finally:
+        with _pdf_renders_lock:
+            _pdf_renders.pop(key, None)
+
+
+def _prerender_pdf(markdown):
+    """Start rendering a report's PDF in the background unless it is cached or in progress."""
+    key = _pdf_key(markdown)
+    with _pdf_renders_lock:
+        future = _pdf_renders.get(key)
+        if future is None:
+            if key in get_pdf_cache():
+                return None
+            future = _pdf_executor.submit(_render_pdf_cached, key, markdown)
+            _pdf_renders[key] = future
+    return future
+
+
+def _pdf_bytes(key, markdown):
+    """Cached PDF for a report, waiting for (or starting) its render on a miss."""
+    data = get_pdf_cache().get(key)
+    if data is not None:
+        return data
+    future = _prerender_pdf(markdown)
+    return future.result() if future is not None else _render_pdf_cached(key, markdown)
 
 
 @app.route('/download/<filename>')
 def download(filename):
     """Download report as PDF."""
     try:
-        if filename in app.temp_reports:
-            pdf_buffer = _markdown_to_pdf(app.temp_reports[filename])
+        markdown = get_reports().get(filename)
+        if markdown is not None:
+            key = _pdf_key(markdown)
+            if key in request.if_none_match:
+                response = Response(status=304)
+                response.set_etag(key)
+                return response
             # Ensure proper PDF filename
             pdf_filename = filename.replace('.md', '.pdf') if filename.endswith('.md') else f"{filename}.pdf"
-            return send_file(
-                pdf_buffer, 
+            response = send_file(
+                io.BytesIO(_pdf_bytes(key, markdown)),
                 mimetype='application/pdf',
                 as_attachment=True,
-                download_name=pdf_filename
+                download_name=pdf_filename,
+                etag=key,
+                max_age=0
             )
+            response.cache_control.no_cache = True
+            return response
         return "Report not found", 404
     except Exception as e:
         return f"Error: {str(e)}", 500
 
 
 if __name__ == '__main__':
+    Config.validate()
+    Config.setup_directories()
+    get_presets()  # index presets and start their PDF renders before serving
     print("\n" + "="*50)
     print("Deep Research AI Agent")
     print("="*50)
@@ -0,0 +1,235 @@
+"""Bulk screening: research many targets concurrently with a resumable manifest."""
+import contextvars
+import csv
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List
+
+import checkpoints
+import runlog
+from agent import resume_research, run_research
+from config import Config
+
+FIELDS = ("target", "context", "focus", "time_period", "industry", "location")
+
+
+def load_targets(path) -> List[Dict]:
+    """Read targets from a CSV file with a header row or from JSON lines.
+
+    Columns/keys are FIELDS plus optional `depth` and `budget`; rows
+    without a target are skipped. Raises ValueError when a CSV has no
+    `target` column or a non-empty file yields no targets.
+    """
+    path = Path(path)
+    # utf-8-sig also reads the byte order mark Excel writes at the start of "CSV UTF-8" files
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            raw_rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            reader = csv.DictReader(f)
+            if reader.fieldnames is not None:
+                reader.fieldnames = [name.strip() for name in reader.fieldnames]
+                if "target" not in reader.fieldnames:
+                    raise ValueError(f"{path}: no 'target' column in header {reader.fieldnames}")
+            raw_rows = list(reader)
+
+    rows = []
+    for number, raw in enumerate(raw_rows, 1):
+        row = {field: str(raw.get(field) or "").strip() for field in FIELDS}
+        if not row["target"]:
+            print(f"⚠️  Skipping row {number}: no target")
+            continue
+        for field, kind in (("depth", int), ("budget", float)):
+            value = str(raw.get(field) or "").strip()
+            row[field] = kind(value) if value else None
+        row["index"] = len(rows) + 1
+        row["key"] = target_key(row)
+        rows.append(row)
+    if raw_rows and not rows:
+        raise ValueError(f"{path}: none of the {len(raw_rows)} rows has a target")
+    return rows
+
+
+def target_key(row: Dict) -> str:
+    """Stable id of a target row, so a resumed batch recognizes finished rows."""
+    params = {field: row.get(field) for field in FIELDS + ("depth", "budget")}
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def batch_run_id(row: Dict, output_dir: Path) -> str:
+    """Checkpoint run id of a target row, stable across resumes of the same batch."""
+    scope = f"{Path(output_dir).resolve()}:{row['key']}"
+    return "batch-" + hashlib.sha256(scope.encode()).hexdigest()[:12]
+
+
+class BatchManifest:
+    """Append-only JSON-lines record of finished targets in a batch directory."""
+
+    def __init__(self, path, resume: bool = False):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.entries = {}
+        if resume and self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry
+        elif self.path.exists():
+            self.path.unlink()
+
+    def completed(self) -> set:
+        return {key for key, entry in self.entries.items() if entry["status"] == "completed"}
+
+    def record(self, entry: Dict):
+        with self._lock:
+            self.entries[entry["key"]] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+def _result_summary(row: Dict, state: Dict) -> Dict:
+    """Scores, entity counts and spend of one finished run."""
+    try:
+        risk = json.loads(state.get("risk_analysis") or "{}")
+    except json.JSONDecodeError:
+        risk = {}
+    try:
+        entities = json.loads(state.get("entities") or "{}")
+    except json.JSONDecodeError:
+        entities = {}
+    return {
+        **{field: row[field] for field in FIELDS},
+        "risk_score": risk.get("total_risk_score", "N/A"),
+        "risk_breakdown": {cat: data.get("score", "N/A") for cat, data in risk.items()
+                           if isinstance(data, dict)},
+        "entities": {kind: len(items) for kind, items in entities.items() if isinstance(items, list)},
+        "sources": state.get("num_sources", 0),
+        "depth": state.get("completed_depth", 0),
+        "stop_reason": state.get("stop_reason", ""),
+        "usage": state.get("usage", {}),
+    }
+
+
+def _run_target(row: Dict, output_dir: Path, default_depth: int, default_budget: float,
+                resume: bool = False) -> Dict:
+    """Research one row, writing its report, result and log into output_dir.
+
+    With `resume`, a row whose earlier run left checkpoints continues from
+    them instead of starting over.
+    """
+    run_id = batch_run_id(row, output_dir)
+    safe_name = "".join(c if c.isalnum() else "_" for c in row["target"])
+    name = f"{row['index']:04d}_{safe_name}"
+    paths = {kind: output_dir / f"{name}.{ext}" for kind, ext in
+             (("report", "md"), ("result", "json"), ("log", "log"), ("trace", "trace.jsonl"))}
+    start = time.time()
+    with open(paths["log"], "w", encoding="utf-8") as log:
+        token = runlog.bind(log, echo=False)
+        try:
+            state = None
+            if resume and Config.CHECKPOINTS_ENABLED:
+                try:
+                    state = resume_research(run_id, trace_path=paths["trace"])
+                except KeyError:
+                    pass
+            if state is None:
+                if Config.CHECKPOINTS_ENABLED:
+                    # Starting over: don't merge into checkpoints an earlier batch left behind
+                    checkpoints.delete_run(run_id)
+                state = run_research(
+                    target=row["target"], max_depth=row["depth"] or default_depth,
+                    context=row["context"], focus=row["focus"], time_period=row["time_period"],
+                    industry=row["industry"], location=row["location"],
+                    budget=row["budget"] if row["budget"] is not None else default_budget,
+                    trace_path=paths["trace"], run_id=run_id
+                )
+        finally:
+            runlog.unbind(token)
+
+    report = state.get("final_report", "")
+    error = state.get("error", "")
+    summary = _result_summary(row, state)
+    paths["report"].write_text(report, encoding="utf-8")
+    paths["result"].write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return {
+        "key": row["key"], "index": row["index"], "target": row["target"], "run_id": run_id,
+        # run_research returns its initial state when the run itself failed, and
+        # a run whose report could not be generated carries an error
+        "status": "completed" if report and not error else "failed",
+        **({"error": error} if error else {}),
+        "risk_score": summary["risk_score"],
+        "spent": summary["usage"].get("spent", 0.0),
+        "seconds": round(time.time() - start, 1),
+        "files": {kind: path.name for kind, path in paths.items()},
+    }
+
+
+def run_batch(input_path, workers: int = None, resume: bool = False, output_dir=None,
+              depth: int = None, budget: float = None) -> Dict:
+    """Research every target in `input_path`, `workers` at a time.
+
+    Each result is written to `output_dir` (default: Config.REPORTS_DIR/batch_<input name>)
+    as soon as it finishes and recorded in its manifest.jsonl. With `resume`,
+    targets already completed in that manifest are skipped; failed ones are retried,
+    continuing from their checkpoints where they have them.
+    Provider concurrency limits in Config apply across all workers.
+    """
+    workers = workers or Config.BATCH_WORKERS
+    depth = depth or Config.MAX_SEARCH_DEPTH
+    output_dir = Path(output_dir or Config.REPORTS_DIR / f"batch_{Path(input_path).stem}")
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    rows = load_targets(input_path)
+    manifest = BatchManifest(output_dir / "manifest.jsonl", resume=resume)
+    done = manifest.completed()
+    pending = [row for row in rows if row["key"] not in done]
+    print(f"Batch: {len(rows)} targets, {len(rows) - len(pending)} already completed, "
+          f"running {len(pending)} with {workers} workers")
+    print(f"Output: {output_dir}\n")
+
+    counts = {"completed": 0, "failed": 0, "spent": 0.0}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+        futures = {
+            executor.submit(contextvars.copy_context().run, _run_target, row, output_dir, depth, budget,
+                            resume): row
+            for row in pending
+        }
+        try:
+            _collect(futures, manifest, counts, len(pending))
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            print("\nStopping: waiting for targets already running; re-run with --resume to continue")
+            raise
+
+    print(f"\nBatch finished: {counts['completed']} completed, {counts['failed']} failed, "
+          f"${counts['spent']:.2f} spent")
+    if counts["failed"]:
+        print("Re-run with --resume to retry failed targets.")
+    return {"output_dir": str(output_dir), "skipped": len(rows) - len(pending), **counts}
+
+
+def _collect(futures: Dict, manifest: BatchManifest, counts: Dict, total: int):
+    """Record each target in the manifest as it finishes and print a progress line."""
+    for finished, future in enumerate(as_completed(futures), 1):
+        row = futures[future]
+        try:
+            entry = future.result()
+        except Exception as e:
+            entry = {"key": row["key"], "index": row["index"], "target": row["target"],
+                     "status": "failed", "error": str(e)}
+        entry["finished_at"] = time.time()
+        manifest.record(entry)
+        counts[entry["status"]] += 1
+        counts["spent"] += entry.get("spent", 0.0)
+        mark = "✓" if entry["status"] == "completed" else "✗"
+        detail = (f"risk {entry['risk_score']}, ${entry['spent']:.2f}, {entry['seconds']}s"
+                  if "seconds" in entry else "")
+        if entry.get("error"):
+            detail = f"{detail}; {entry['error']}" if detail else entry["error"]
+        print(f"[{finished}/{total}] {mark} {row['target']} ({detail})")
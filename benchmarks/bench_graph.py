@@ -0,0 +1,136 @@
+"""Micro-benchmark of research graph orchestration overhead with stubbed providers.
+
+Provider requests are replaced by stubs that sleep for a fixed latency. The
+wall time during which no stubbed call is in flight is the cost of graph
+construction, LangGraph scheduling, prompt building, packing and accounting.
+
+Usage: python benchmarks/bench_graph.py [--runs N] [--depth D] [--latency SECONDS]
+"""
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import agent  # noqa: E402
+import tools  # noqa: E402
+from config import Config  # noqa: E402
+from models import Models  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+_provider_intervals = []
+_provider_lock = threading.Lock()
+
+
+def _stub(response, latency):
+    """A provider request stand-in that sleeps and records when it was in flight."""
+    def request(*args, **kwargs):
+        start = time.perf_counter()
+        time.sleep(latency)
+        text = response(*args) if callable(response) else response
+        with _provider_lock:
+            _provider_intervals.append((start, time.perf_counter()))
+        return text
+    return request
+
+
+def _covered_seconds(intervals):
+    """Total time covered by possibly overlapping (start, end) intervals."""
+    total, current_start, current_end = 0.0, None, None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+def install_stubs(latency: float):
+    counter = iter(range(10 ** 9))
+
+    def gpt4(self, messages, *args):
+        if "CURRENT DEPTH" in messages[-1]["content"]:
+            return json.dumps([f"Jane Target subject {next(counter)}" for _ in range(5)])
+        return "# Report\n\nText."
+
+    def search(query, max_results=5):
+        return [{"title": f"Result for {query}", "url": f"https://example.com/{abs(hash(query))}",
+                 "snippet": f"{query} " * 40}]
+
+    Models._gpt4_request = _stub(gpt4, latency)
+    stream = _stub(lambda self, messages, temperature, max_tokens, on_chunk: "# Report\n\nText.", latency)
+    Models._gpt4_stream_request = stream
+    Models._claude_request = _stub(json.dumps({"total_risk_score": 40}), latency)
+    Models._gemini_request = _stub(json.dumps({"people": [{"name": "Jane Doe"}]}), latency)
+    tools.perplexity_search = _stub(search, latency)
+
+    Config.RESPONSE_CACHE_MODE = "off"
+    Config.SEARCH_CACHE_ENABLED = False
+    for key in ("AZURE_OPENAI_KEY", "AZURE_OPENAI_ENDPOINT", "ANTHROPIC_API_KEY",
+                "GEMINI_API_KEY", "PERPLEXITY_API_KEY"):
+        setattr(Config, key, getattr(Config, key) or "benchmark")
+
+
+def timed_run(depth: int, workdir: str, rebuild: bool):
+    """Wall time of one research run and the part of it with provider calls in flight."""
+    if rebuild:
+        agent._compiled_graphs.clear()
+    _provider_intervals.clear()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent.run_research("Jane Target", max_depth=depth,
+                           trace_path=Path(workdir) / "bench.trace.jsonl")
+    return time.perf_counter() - start, _covered_seconds(_provider_intervals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark research graph orchestration overhead")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Simulated seconds per provider call (default: 0)")
+    args = parser.parse_args()
+    install_stubs(args.latency)
+
+    start = time.perf_counter()
+    import langgraph.graph  # noqa: F401
+    import_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    agent.create_research_graph()
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"LangGraph import: {import_ms:.1f} ms, graph build + compile: {build_ms:.1f} ms\n")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        Config.OUTPUT_DIR = Path(workdir)
+        Config.REPORTS_DIR = Path(workdir) / "reports"
+        Config.LOGS_DIR = Path(workdir) / "logs"
+        Config.CHECKPOINT_PATH = Path(workdir) / "checkpoints.sqlite3"
+        timed_run(args.depth, workdir, rebuild=False)  # warm imports and the cached graph
+        for label, rebuild in (("compiled per run", True), ("cached graph", False)):
+            walls, overheads = [], []
+            for _ in range(args.runs):
+                wall, provider = timed_run(args.depth, workdir, rebuild)
+                walls.append(wall)
+                overheads.append(wall - provider)
+            rows.append([label, f"{statistics.median(walls) * 1000:.1f}",
+                         f"{statistics.median(overheads) * 1000:.1f}",
+                         f"{min(overheads) * 1000:.1f}"])
+    print(tabulate(rows, headers=["Mode", "Median run ms", "Median overhead ms", "Min overhead ms"]))
+    print("\nOverhead = run wall time with no stubbed provider call in flight.")
+
+
+if __name__ == "__main__":
+    main()
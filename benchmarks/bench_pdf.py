@@ -0,0 +1,72 @@
+"""Benchmark markdown-to-PDF rendering over the preset reports.
+
+Usage: python benchmarks/bench_pdf.py [--iterations N]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pdf  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+
+def load_presets():
+    presets = {}
+    for path in sorted((ROOT / "static" / "presets").glob("*.json")):
+        with open(path) as f:
+            presets[path.stem] = json.load(f).get("full_report_markdown", "")
+    return presets
+
+
+def bench(markdown, iterations):
+    """Render `markdown` repeatedly.
+
+    Returns total render timings and markup-to-flowables timings (s), peak
+    traced memory (bytes) and PDF size.
+    """
+    timings, parse_timings = [], []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        pdf.build_elements(markdown)
+        parse_timings.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        size = len(pdf.markdown_to_pdf(markdown).getvalue())
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    pdf.markdown_to_pdf(markdown)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return timings, parse_timings, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF rendering of preset reports")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    pdf.get_styles()
+    print(f"Style setup (once per process): {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    rows = []
+    for name, markdown in load_presets().items():
+        timings, parse_timings, peak, size = bench(markdown, args.iterations)
+        rows.append([
+            name, f"{len(markdown) / 1024:.1f}", f"{size / 1024:.1f}",
+            f"{statistics.median(timings) * 1000:.1f}", f"{min(timings) * 1000:.1f}",
+            f"{max(timings) * 1000:.1f}", f"{statistics.median(parse_timings) * 1000:.1f}",
+            f"{peak / 1024 / 1024:.2f}",
+        ])
+    print(tabulate(rows, headers=["Preset", "Markdown KB", "PDF KB", "Median ms",
+                                  "Min ms", "Max ms", "Parse ms", "Peak MB"]))
+
+
+if __name__ == "__main__":
+    main()
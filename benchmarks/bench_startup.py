@@ -0,0 +1,62 @@
+"""Benchmark cold import time of the CLI and web entry points.
+
+Each sample imports the module in a fresh interpreter, so nothing is shared
+between runs except the OS file cache. Besides the import itself, the whole
+process lifetime is timed (interpreter exit waits for any threads the import
+started) and the threads and files left behind by the import are reported.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [modules ...]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from tabulate import tabulate  # noqa: E402
+
+SNIPPET = ("import threading, time; start = time.perf_counter(); import {module}; "
+           "print(time.perf_counter() - start, threading.active_count() - 1)")
+
+
+def cold_import(module: str, workdir: str):
+    """(import seconds, process seconds, threads started) for `module` in a new interpreter."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT) + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", SNIPPET.format(module=module)],
+                            cwd=workdir, env=env, capture_output=True, text=True, check=True)
+    process = time.perf_counter() - start
+    seconds, threads = result.stdout.strip().splitlines()[-1].split()
+    return float(seconds), process, int(threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold import time")
+    parser.add_argument("modules", nargs="*", default=["main", "app", "agent", "pdf", "prompts"])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    for module in args.modules:
+        # A fresh scratch directory per module shows what importing it writes to disk
+        with tempfile.TemporaryDirectory() as workdir:
+            cold_import(module, workdir)  # warm the OS file cache
+            samples = [cold_import(module, workdir) for _ in range(args.runs)]
+            created = sorted(os.listdir(workdir))
+        imports = [s[0] for s in samples]
+        rows.append([module, f"{statistics.median(imports) * 1000:.0f}",
+                     f"{min(imports) * 1000:.0f}", f"{max(imports) * 1000:.0f}",
+                     f"{statistics.median(s[1] for s in samples) * 1000:.0f}",
+                     max(s[2] for s in samples), ", ".join(created) or "-"])
+    print(tabulate(rows, headers=["Module", "Median ms", "Min ms", "Max ms", "Process ms",
+                                  "Threads", "Files created"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Durable research run checkpoints in SQLite, so failed or interrupted runs can resume.
+
+The research graph is compiled with a LangGraph SqliteSaver and each run is
+a thread keyed by its run id. After every step LangGraph stores the state,
+plus the writes of nodes that finished in a step that did not complete.
+"""
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from config import Config
+
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer():
+    """The process-wide SqliteSaver, opening Config.CHECKPOINT_PATH on first use."""
+    global _checkpointer
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                from langgraph.checkpoint.sqlite import SqliteSaver
+
+                Config.CHECKPOINT_PATH.parent.mkdir(parents=True, exist_ok=True)
+                # SqliteSaver serializes access to the connection with its own lock
+                conn = sqlite3.connect(str(Config.CHECKPOINT_PATH), check_same_thread=False)
+                _checkpointer = SqliteSaver(conn)
+    return _checkpointer
+
+
+def run_config(run_id: str) -> Dict:
+    """LangGraph config addressing a run's checkpoints."""
+    return {"configurable": {"thread_id": run_id}}
+
+
+def load_state(run_id: str) -> Optional[Dict]:
+    """State saved at the run's latest checkpoint, or None if it has none."""
+    saved = get_checkpointer().get_tuple(run_config(run_id))
+    return saved.checkpoint["channel_values"] if saved else None
+
+
+def list_runs() -> List[Dict]:
+    """Runs with checkpoints, most recently saved first."""
+    saver = get_checkpointer()
+    runs = []
+    with saver.cursor(transaction=False) as cur:
+        thread_ids = [row[0] for row in cur.execute(
+            "SELECT thread_id FROM checkpoints GROUP BY thread_id ORDER BY MAX(checkpoint_id) DESC"
+        )]
+    for run_id in thread_ids:
+        state = load_state(run_id) or {}
+        runs.append({"run_id": run_id, "target": state.get("target", ""),
+                     "depth": state.get("completed_depth", 0), "max_depth": state.get("max_depth", 0),
+                     "spent": (state.get("usage") or {}).get("spent", 0.0)})
+    return runs
+
+
+def delete_run(run_id: str):
+    """Drop a run's checkpoints (SqliteSaver has no delete, so this uses its tables)."""
+    with get_checkpointer().cursor() as cur:
+        cur.execute("DELETE FROM checkpoints WHERE thread_id = ?", (run_id,))
+        cur.execute("DELETE FROM writes WHERE thread_id = ?", (run_id,))
@@ -21,16 +21,123 @@ class Config:
     MAX_SEARCH_DEPTH = int(os.getenv("MAX_SEARCH_DEPTH", "3"))
     MAX_QUERIES_PER_SEARCH = int(os.getenv("MAX_QUERIES_PER_SEARCH", "5"))
     MAX_RESULTS_PER_QUERY = int(os.getenv("MAX_RESULTS_PER_QUERY", "3"))
+    QUERY_DEDUP_THRESHOLD = float(os.getenv("QUERY_DEDUP_THRESHOLD", "0.8"))
     DEFAULT_BUDGET = float(os.getenv("DEFAULT_BUDGET", "20.0"))
 
+    # Spend accounting: USD per 1M input/output tokens for each provider
+    PRICING = {
+        "gpt4": (2.00, 8.00),
+        "claude": (3.00, 15.00),
+        "gemini": (0.10, 0.40),
+        "perplexity": (3.00, 15.00),
+    }
+    PERPLEXITY_REQUEST_FEE = float(os.getenv("PERPLEXITY_REQUEST_FEE", "0.006"))
+    # Fractions of the budget at which a run cuts back (fewer queries, smaller
+    # prompts) and stops deepening to leave room for the report
+    BUDGET_SOFT_LIMIT = float(os.getenv("BUDGET_SOFT_LIMIT", "0.7"))
+    BUDGET_HARD_LIMIT = float(os.getenv("BUDGET_HARD_LIMIT", "0.9"))
+    BUDGET_REDUCED_QUERIES = int(os.getenv("BUDGET_REDUCED_QUERIES", "3"))
+
+    # Provider limits shared by every run in the process: max in-flight calls
+    # (reduced automatically while a provider throttles) and requests/tokens
+    # per minute (0 = no proactive limit; 429 responses are still honored)
+    PERPLEXITY_CONCURRENCY = int(os.getenv("PERPLEXITY_CONCURRENCY", "5"))
+    GPT4_CONCURRENCY = int(os.getenv("GPT4_CONCURRENCY", "8"))
+    CLAUDE_CONCURRENCY = int(os.getenv("CLAUDE_CONCURRENCY", "4"))
+    GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "8"))
+    RATE_LIMITS = {
+        provider: (float(os.getenv(f"{provider.upper()}_RPM", "0")),
+                   float(os.getenv(f"{provider.upper()}_TPM", "0")),
+                   concurrency)
+        for provider, concurrency in (("perplexity", PERPLEXITY_CONCURRENCY), ("gpt4", GPT4_CONCURRENCY),
+                                      ("claude", CLAUDE_CONCURRENCY), ("gemini", GEMINI_CONCURRENCY))
+    }
+    # Throttled calls are retried this many times, waiting Retry-After (or the default backoff)
+    RATE_LIMIT_RETRIES = int(os.getenv("RATE_LIMIT_RETRIES", "3"))
+    RATE_LIMIT_DEFAULT_BACKOFF = float(os.getenv("RATE_LIMIT_DEFAULT_BACKOFF", "5"))
+    # Other failures: retries per error class ("timeout:2,connection:3,...";
+    # client errors such as bad auth are never worth retrying), jittered
+    # exponential backoff between them, and a total deadline per call
+    RETRY_POLICY = {
+        error_class: int(retries) for error_class, retries in
+        (item.split(":") for item in os.getenv(
+            "RETRY_POLICY", "timeout:2,connection:3,server:3,other:1,client:0,throttle:0").split(",") if item)
+    }
+    RETRY_BACKOFF_BASE = float(os.getenv("RETRY_BACKOFF_BASE", "0.5"))
+    RETRY_BACKOFF_MAX = float(os.getenv("RETRY_BACKOFF_MAX", "8"))
+    CALL_DEADLINES = {
+        "perplexity": float(os.getenv("SEARCH_CALL_DEADLINE", "60")),
+        **{provider: float(os.getenv("LLM_CALL_DEADLINE", "240")) for provider in ("gpt4", "claude", "gemini")},
+    }
+    # Providers whose slow calls get a duplicate request after their observed
+    # p95 latency (once HEDGE_MIN_SAMPLES calls have been timed)
+    HEDGE_PROVIDERS = set(filter(None, os.getenv("HEDGE_PROVIDERS", "perplexity,gemini").split(",")))
+    HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+
+    # Perplexity HTTP connection pool
+    PERPLEXITY_POOL_SIZE = int(os.getenv("PERPLEXITY_POOL_SIZE", "10"))
+    PERPLEXITY_KEEPALIVE_EXPIRY = float(os.getenv("PERPLEXITY_KEEPALIVE_EXPIRY", "60"))
+    PERPLEXITY_CONNECT_TIMEOUT = float(os.getenv("PERPLEXITY_CONNECT_TIMEOUT", "10"))
+    PERPLEXITY_TIMEOUT = float(os.getenv("PERPLEXITY_TIMEOUT", "30"))
+    PERPLEXITY_HTTP2 = os.getenv("PERPLEXITY_HTTP2", "true").lower() == "true"
+
+    # Search result cache
+    SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+    SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+
+    # LLM response cache: off, on, record or replay (replay also serves searches offline)
+    RESPONSE_CACHE_MODE = os.getenv("RESPONSE_CACHE_MODE", "off").lower()
+    RESPONSE_CACHE_MEMORY_ENTRIES = int(os.getenv("RESPONSE_CACHE_MEMORY_ENTRIES", "256"))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "20000"))
+
+    # Adaptive depth: from CONVERGENCE_MIN_DEPTH on, stop deepening once a depth
+    # finds fewer novel URLs and new entities than these and moves the total
+    # risk score by less than CONVERGENCE_MAX_RISK_DELTA points
+    ADAPTIVE_DEPTH = os.getenv("ADAPTIVE_DEPTH", "true").lower() == "true"
+    CONVERGENCE_MIN_DEPTH = int(os.getenv("CONVERGENCE_MIN_DEPTH", "2"))
+    CONVERGENCE_MIN_NEW_URLS = int(os.getenv("CONVERGENCE_MIN_NEW_URLS", "3"))
+    CONVERGENCE_MIN_NEW_ENTITIES = int(os.getenv("CONVERGENCE_MIN_NEW_ENTITIES", "2"))
+    CONVERGENCE_MAX_RISK_DELTA = float(os.getenv("CONVERGENCE_MAX_RISK_DELTA", "5"))
+
+    # Web research jobs
+    MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "2"))
+    MAX_PENDING_JOBS = int(os.getenv("MAX_PENDING_JOBS", "20"))
+
+    # Run checkpoints for resuming failed runs; kept after success only if asked
+    CHECKPOINTS_ENABLED = os.getenv("CHECKPOINTS_ENABLED", "true").lower() == "true"
+    CHECKPOINT_KEEP_COMPLETED = os.getenv("CHECKPOINT_KEEP_COMPLETED", "false").lower() == "true"
+
+    # CLI batch screening: targets researched at once
+    BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+
+    # Downloadable web reports: memory cap, file count cap and age limit (0 disables)
+    REPORT_STORE_MEMORY_MB = float(os.getenv("REPORT_STORE_MEMORY_MB", "32"))
+    REPORT_STORE_MAX_FILES = int(os.getenv("REPORT_STORE_MAX_FILES", "5000"))
+    REPORT_STORE_TTL_DAYS = float(os.getenv("REPORT_STORE_TTL_DAYS", "30"))
+    # Rendered PDFs, keyed by report content hash
+    PDF_CACHE_MAX_MB = float(os.getenv("PDF_CACHE_MAX_MB", "256"))
+    PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "1"))
+    # Seconds between checks of static/presets for changed files
+    PRESET_RELOAD_INTERVAL = float(os.getenv("PRESET_RELOAD_INTERVAL", "2"))
+
     # Output paths
     OUTPUT_DIR = Path("outputs")
     REPORTS_DIR = OUTPUT_DIR / "reports"
     LOGS_DIR = OUTPUT_DIR / "logs"
+    WEB_REPORTS_DIR = REPORTS_DIR / "web"
+    PDF_CACHE_DIR = OUTPUT_DIR / "pdf_cache"
+    SEARCH_CACHE_PATH = OUTPUT_DIR / "search_cache.sqlite3"
+    RESPONSE_CACHE_PATH = OUTPUT_DIR / "response_cache.sqlite3"
+    CHECKPOINT_PATH = OUTPUT_DIR / "checkpoints.sqlite3"
 
     @classmethod
     def validate(cls):
         """Ensure all required API keys are configured."""
+        if cls.RESPONSE_CACHE_MODE not in ("off", "on", "record", "replay"):
+            raise ValueError(f"Invalid RESPONSE_CACHE_MODE: {cls.RESPONSE_CACHE_MODE}")
+        if cls.RESPONSE_CACHE_MODE == "replay":
+            return
         required = {
             "AZURE_OPENAI_KEY": cls.AZURE_OPENAI_KEY,
             "AZURE_OPENAI_ENDPOINT": cls.AZURE_OPENAI_ENDPOINT,
@@ -48,7 +155,3 @@ class Config:
         cls.OUTPUT_DIR.mkdir(exist_ok=True)
         cls.REPORTS_DIR.mkdir(exist_ok=True)
         cls.LOGS_DIR.mkdir(exist_ok=True)
-
-
-Config.validate()
-Config.setup_directories()
@@ -0,0 +1,78 @@
+"""Per-run structured progress events that clients can follow live."""
+import contextvars
+import threading
+import time
+from typing import Dict, Iterator
+
+_current_stream = contextvars.ContextVar("event_stream", default=None)
+
+
+class EventStream:
+    """Append-only event log for one run with blocking readers.
+
+    Each event gets a sequential id so a reader that reconnects can resume
+    after the last id it saw. Only the most recent `max_events` are kept.
+    """
+
+    def __init__(self, max_events: int = 5000):
+        self.max_events = max_events
+        self._events = []
+        self._next_id = 1
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def emit(self, event_type: str, **data):
+        with self._cond:
+            self._events.append({"id": self._next_id, "type": event_type,
+                                 "time": time.time(), "data": data})
+            self._next_id += 1
+            if len(self._events) > self.max_events:
+                del self._events[:len(self._events) - self.max_events]
+            self._cond.notify_all()
+
+    def close(self):
+        """Mark the stream finished; readers drain remaining events and stop."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def follow(self, after_id: int = 0, heartbeat: float = 15.0) -> Iterator[Dict]:
+        """Yield events with id > after_id as they arrive until the stream closes.
+
+        Yields None every `heartbeat` seconds without events so callers can
+        keep idle connections alive.
+        """
+        while True:
+            with self._cond:
+                pending = [e for e in self._events if e["id"] > after_id]
+                if not pending and not self._closed:
+                    self._cond.wait(heartbeat)
+                    pending = [e for e in self._events if e["id"] > after_id]
+                closed = self._closed
+            if pending:
+                after_id = pending[-1]["id"]
+                yield from pending
+            elif closed:
+                return
+            else:
+                yield None
+
+
+def bind(stream: EventStream):
+    """Route emit() calls in the current context to `stream`; returns a reset token."""
+    return _current_stream.set(stream)
+
+
+def unbind(token):
+    _current_stream.reset(token)
+
+
+def emit(event_type: str, **data):
+    """Emit an event to the current run's stream, if one is bound."""
+    stream = _current_stream.get()
+    if stream is not None:
+        stream.emit(event_type, **data)
@@ -0,0 +1,85 @@
+"""Structured store of search findings and on-demand prompt rendering."""
+import hashlib
+from itertools import groupby
+from typing import Dict, Iterable, List
+
+from tools import format_search_results
+
+SNIPPET_CHARS = 500
+MAX_FINDINGS_PER_RUN = 1000
+
+# Pseudo-URLs that do not identify a source; these are deduplicated by content
+PLACEHOLDER_URLS = {"perplexity_response", "N/A", ""}
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode()).hexdigest()[:16]
+
+
+def _identity(record: Dict) -> str:
+    """Dedup key: a source's URL plus its content, or the content alone for placeholders.
+
+    Several queries often cite the same top source with different answer text,
+    so a record only duplicates an earlier one when its content matches too.
+    """
+    if record["url"] in PLACEHOLDER_URLS:
+        return f"hash:{record['hash']}"
+    return f"{record['url']}#{record['hash']}"
+
+
+def new_findings(existing: List[Dict], search_results: Dict[str, List[Dict]], depth: int) -> List[Dict]:
+    """Turn batch_search output into compact source records not already in `existing`.
+
+    Error results are dropped. A record with text is skipped only when the
+    same URL already has the same text; a bare citation (no text) is skipped
+    when its URL was seen at all. The store grows only with new information.
+    """
+    seen = {_identity(r) for r in existing}
+    seen_urls = {r["url"] for r in existing}
+    room = MAX_FINDINGS_PER_RUN - len(existing)
+    records = []
+    for query, results in search_results.items():
+        for result in results:
+            url = result.get("url", "")
+            if url == "error":
+                continue
+            snippet = (result.get("snippet") or "")[:SNIPPET_CHARS]
+            record = {
+                "url": url,
+                "title": result.get("title", ""),
+                "query": query,
+                "depth": depth,
+                "snippet": snippet,
+                "hash": content_hash(snippet),
+            }
+            identity = _identity(record)
+            duplicate = identity in seen or (not snippet.strip() and url in seen_urls)
+            if duplicate or len(records) >= room:
+                continue
+            seen.add(identity)
+            seen_urls.add(url)
+            records.append(record)
+    return records
+
+
+def render_findings(records: Iterable[Dict], max_chars: int = None) -> str:
+    """Render records as prompt text grouped by query, in store order.
+
+    With `max_chars`, the most recent records that fit are kept.
+    """
+    records = list(records)
+    if max_chars is not None:
+        kept, used = [], 0
+        for record in reversed(records):
+            size = len(record["snippet"]) + len(record["url"]) + len(record["title"]) + 16
+            if used + size > max_chars:
+                break
+            kept.append(record)
+            used += size
+        records = kept[::-1]
+
+    blocks = []
+    for query, group in groupby(records, key=lambda r: r["query"]):
+        blocks.append(f"\n[Query: {query}]")
+        blocks.append(format_search_results(list(group)))
+    return "\n".join(blocks)
@@ -0,0 +1,132 @@
+"""Background job execution for long-running research requests."""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import events
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when its cancel flag is observed."""
+
+
+class QueueFull(Exception):
+    """Raised when too many jobs are already waiting or running."""
+
+
+class Job:
+    """A single queued or running unit of work and its outcome."""
+
+    def __init__(self, params: Dict):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.events = events.EventStream()
+        self.future = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "target": self.params.get("target"),
+            "run_id": self.params.get("run_id"),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Runs jobs on a bounded worker pool and keeps recent jobs for lookup.
+
+    `runner(job)` does the work and returns the job's result; it should check
+    `job.cancel_event` and raise JobCancelled to stop early. Progress events
+    emitted while it runs go to `job.events`, which closes when the job ends.
+    """
+
+    def __init__(self, runner: Callable[[Job], Dict], max_workers: int = 2,
+                 max_pending: int = 20, max_history: int = 200):
+        self.runner = runner
+        self.max_pending = max_pending
+        self.max_history = max_history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, params: Dict) -> Job:
+        job = Job(params)
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if not j.done)
+            if pending >= self.max_pending:
+                raise QueueFull(f"{pending} jobs already pending")
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find_active(self, **params) -> Optional[Job]:
+        """A queued or running job whose params include all the given values."""
+        with self._lock:
+            for job in self._jobs.values():
+                if not job.done and all(job.params.get(k) == v for k, v in params.items()):
+                    return job
+        return None
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued job immediately or ask a running one to stop."""
+        job = self.get(job_id)
+        if job is None or job.done:
+            return job
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, "cancelled")
+        return job
+
+    def _run(self, job: Job):
+        if job.cancel_event.is_set():
+            self._finish(job, "cancelled")
+            return
+        job.status = "running"
+        job.started_at = time.time()
+        job.events.emit("job", status="running")
+        token = events.bind(job.events)
+        try:
+            job.result = self.runner(job)
+            self._finish(job, "completed")
+        except JobCancelled:
+            self._finish(job, "cancelled")
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, "failed")
+        finally:
+            events.unbind(token)
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = time.time()
+        job.events.emit("job", status=status, error=job.error)
+        job.events.close()
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond the history limit."""
+        excess = len(self._jobs) - self.max_history
+        for job_id in [j.id for j in self._jobs.values() if j.done][:max(excess, 0)]:
+            del self._jobs[job_id]
@@ -1,8 +1,13 @@
 """Command-line interface for the research agent."""
 import argparse
 import json
-from agent import run_research
+from tabulate import tabulate
+from agent import new_run_id, resume_research, run_research
 from config import Config
+from tools import get_search_client, get_search_cache
+import ratelimit
+import resilience
+import tracing
 
 
 def display_summary(state):
@@ -11,8 +16,12 @@ def display_summary(state):
     print("RESEARCH SUMMARY")
     print(f"{'='*50}")
     print(f"\nTarget: {state.get('target')}")
+    if state.get('error'):
+        print(f"FAILED: {state['error']}")
     print(f"Iterations: {state.get('depth')}")
     print(f"Sources: {state.get('num_sources')}")
+    print(f"Queries: {len(state.get('executed_queries', []))} executed, "
+          f"{state.get('queries_skipped', 0)} near-duplicates skipped")
     
     try:
         risk_data = json.loads(state.get('risk_analysis', '{}'))
@@ -32,38 +41,146 @@ def display_summary(state):
     except:
         pass
     
+    usage = state.get('usage') or {}
+    if usage:
+        print(f"\nSpend: ${usage.get('spent', 0):.2f} of ${usage.get('budget', 0):.2f} budget "
+              f"({usage.get('input_tokens', 0)} input / {usage.get('output_tokens', 0)} output tokens)")
+        for row in usage.get('by_node', []):
+            print(f"  {row['node']:<8} {row['provider']:<11} {row['calls']:>3} calls "
+                  f"({row['cached_calls']} cached)  {row['input_tokens']:>7} in  "
+                  f"{row['output_tokens']:>6} out  ${row['cost']:.3f}")
+    if state.get('stop_reason'):
+        print(f"Stopped early: {state['stop_reason']}")
+    
+    display_timing(state.get('trace_file'))
+    
+    http_stats = get_search_client().stats()
+    print(f"\nPerplexity HTTP: {http_stats['requests']} requests over "
+          f"{http_stats['connections_opened']} connections "
+          f"({http_stats['reused_requests']} reused, HTTP/2: {http_stats['http2']})")
+    if Config.SEARCH_CACHE_ENABLED:
+        cache_stats = get_search_cache().stats()
+        print(f"Search cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+              f"{cache_stats['entries']} entries")
+    for provider, limits in ratelimit.stats().items():
+        if limits['throttled'] or limits['wait_seconds']:
+            print(f"Rate limits ({provider}): {limits['throttled']} throttled responses, "
+                  f"{limits['wait_seconds']:.1f}s waiting, concurrency {limits['concurrency']}/{limits['max_concurrency']}")
+    for provider, calls in resilience.stats().items():
+        if calls['p50'] is None:
+            continue
+        print(f"Latency ({provider}): p50 {calls['p50']:.2f}s, p95 {calls['p95']:.2f}s, p99 {calls['p99']:.2f}s "
+              f"over {calls['samples']} calls; {calls['retries']} retries, "
+              f"{calls['hedges']} hedged ({calls['hedge_wins']} won), {calls['failures']} failed")
+    
     print(f"\n{'='*50}\n")
 
 
+def display_timing(trace_file):
+    """Print where wall-clock time went, from the run's trace."""
+    spans = tracing.load_spans(trace_file) if trace_file else []
+    if not spans:
+        return
+    summary = tracing.summarize(spans)
+    
+    print(f"\nTiming (wall clock {summary['wall_seconds']:.1f}s), critical path:")
+    rows = []
+    for step in summary['critical_path']:
+        calls = ", ".join(f"{name} {c['count']}x {c['seconds']:.1f}s"
+                          for name, c in sorted(step['calls'].items()))
+        parallel = f" (parallel: {', '.join(step['parallel'])})" if step['parallel'] else ""
+        rows.append([step['node'] + parallel, step['depth'], f"{step['seconds']:.2f}", calls])
+    print(tabulate(rows, headers=["Node", "Depth", "Seconds", "Calls"]))
+    
+    rows = [[name, p['calls'], f"{p['seconds']:.1f}", f"{p['seconds'] / p['calls']:.2f}",
+             p['input_tokens'], p['output_tokens'], p['response_chars'], p['retries'], p['errors']]
+            for name, p in sorted(summary['providers'].items())]
+    print()
+    print(tabulate(rows, headers=["Provider", "Calls", "Total s", "Avg s", "In tok",
+                                  "Out tok", "Resp chars", "Retries", "Errors"]))
+    print(f"Trace: {trace_file}")
+
+
 def main():
     """Parse arguments and run research."""
     parser = argparse.ArgumentParser(description="Deep Research AI Agent")
-    parser.add_argument('--target', required=True, help='Person to research')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--target', help='Person to research')
+    source.add_argument('--batch', metavar='FILE',
+                        help='CSV (with header) or JSONL file of targets to screen; columns: '
+                             'target, context, focus, time_period, industry, location, depth, budget')
+    source.add_argument('--resume-run', metavar='RUN_ID',
+                        help='Continue a failed or interrupted run from its last checkpoint')
+    source.add_argument('--list-runs', action='store_true',
+                        help='List runs with checkpoints that can be resumed')
     parser.add_argument('--context', default='', help='Additional context')
     parser.add_argument('--focus', default='', help='Focus areas')
     parser.add_argument('--time-period', default='', help='Time period')
     parser.add_argument('--industry', default='', help='Industry')
     parser.add_argument('--location', default='', help='Location')
     parser.add_argument('--depth', type=int, default=5, help='Max depth (default: 5)')
+    parser.add_argument('--budget', type=float, default=None,
+                        help=f'Spend cap in USD (default: {Config.DEFAULT_BUDGET})')
+    parser.add_argument('--workers', type=int, default=Config.BATCH_WORKERS,
+                        help=f'Targets researched at once in batch mode (default: {Config.BATCH_WORKERS})')
+    parser.add_argument('--resume', action='store_true',
+                        help='Batch mode: skip targets already completed in the output manifest')
+    parser.add_argument('--output', default=None,
+                        help='Batch mode: output directory (default: outputs/reports/batch_<file name>)')
     
     args = parser.parse_args()
     
+    if args.list_runs:
+        import checkpoints
+        runs = checkpoints.list_runs()
+        print(tabulate([[r['run_id'], r['target'], f"{r['depth']}/{r['max_depth']}", f"${r['spent']:.2f}"]
+                        for r in runs], headers=["Run", "Target", "Depth", "Spent"])
+              if runs else "No resumable runs")
+        return
+    
+    if args.resume_run:
+        try:
+            display_summary(resume_research(args.resume_run))
+        except KeyboardInterrupt:
+            print(f"\nInterrupted; resume with --resume-run {args.resume_run}")
+        except Exception as e:
+            print(f"\nError: {e}")
+        return
+    
+    if args.batch:
+        try:
+            Config.validate()
+            Config.setup_directories()
+            from batch import run_batch
+            run_batch(args.batch, workers=args.workers, resume=args.resume,
+                      output_dir=args.output, depth=args.depth, budget=args.budget)
+        except KeyboardInterrupt:
+            print("\nInterrupted; re-run with --resume to continue")
+        except Exception as e:
+            print(f"\nError: {e}")
+        return
+    
     print(f"\n{'#'*50}")
     print("DEEP RESEARCH AI AGENT")
     print(f"{'#'*50}")
     print(f"\nTarget: {args.target}")
     print(f"Max Depth: {args.depth}\n")
     
+    run_id = new_run_id()
     try:
+        Config.validate()
+        Config.setup_directories()
         state = run_research(
             target=args.target, max_depth=args.depth, context=args.context,
             focus=args.focus, time_period=args.time_period,
-            industry=args.industry, location=args.location
+            industry=args.industry, location=args.location, budget=args.budget,
+            run_id=run_id
         )
         display_summary(state)
-        print("Done! Run via web: http://localhost:5001\n")
+        if not state.get('error'):
+            print("Done! Run via web: http://localhost:5001\n")
     except KeyboardInterrupt:
-        print("\nInterrupted")
+        print("\nInterrupted" + (f"; resume with --resume-run {run_id}" if Config.CHECKPOINTS_ENABLED else ""))
     except Exception as e:
         print(f"\nError: {e}")
 
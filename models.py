@@ -1,66 +1,249 @@
 """LLM client wrappers for GPT-4, Claude, and Gemini."""
-from openai import AzureOpenAI
-from anthropic import Anthropic
-import google.generativeai as genai
+import hashlib
+import json
+import threading
+import time
+import accounting
+import events
+import resilience
+import tracing
+from cache import ResponseCache
 from config import Config
 
+CLAUDE_MODEL = "claude-sonnet-4-20250514"
+GEMINI_MODEL = "gemini-2.0-flash-exp"
+PROVIDER_LABELS = {"gpt4": "GPT-4", "claude": "Claude", "gemini": "Gemini"}
+
+
+def response_cache_key(provider, model, prompt, temperature, max_tokens):
+    """Content address for an LLM call: provider, model, prompt hash and sampling params."""
+    prompt_hash = hashlib.sha256(json.dumps(prompt, sort_keys=True).encode()).hexdigest()
+    return hashlib.sha256(
+        json.dumps([provider, model, prompt_hash, temperature, max_tokens]).encode()
+    ).hexdigest()
+
 
 class Models:
-    """Unified interface for all LLM providers."""
-    
+    """Unified interface for all LLM providers.
+
+    Provider SDKs are imported and clients created on first use. Responses can be served from a
+    content-addressed cache according to Config.RESPONSE_CACHE_MODE:
+    "off" always calls the provider, "on" reads and writes the cache,
+    "record" always calls the provider and stores the response, and
+    "replay" serves recorded responses only and never touches the network.
+    """
+
     def __init__(self):
-        # GPT-4 via Azure OpenAI
-        self.azure_client = AzureOpenAI(
-            api_key=Config.AZURE_OPENAI_KEY,
-            api_version=Config.AZURE_OPENAI_VERSION,
-            azure_endpoint=Config.AZURE_OPENAI_ENDPOINT
-        )
-        # Claude via Anthropic
-        self.anthropic_client = Anthropic(api_key=Config.ANTHROPIC_API_KEY)
-        # Gemini via Google
-        genai.configure(api_key=Config.GEMINI_API_KEY)
-        self.gemini_model = genai.GenerativeModel('gemini-2.0-flash-exp')
-
-    def gpt4_call(self, messages, temperature=0.7, max_tokens=8000):
-        """Query generation and report synthesis."""
+        self._lock = threading.Lock()
+        self._azure_client = None
+        self._anthropic_client = None
+        self._gemini_model = None
+        self._cache = None
+
+    @property
+    def azure_client(self):
+        """GPT-4 via Azure OpenAI."""
+        if self._azure_client is None:
+            with self._lock:
+                if self._azure_client is None:
+                    from openai import AzureOpenAI
+                    self._azure_client = AzureOpenAI(
+                        api_key=Config.AZURE_OPENAI_KEY,
+                        api_version=Config.AZURE_OPENAI_VERSION,
+                        azure_endpoint=Config.AZURE_OPENAI_ENDPOINT
+                    )
+        return self._azure_client
+
+    @property
+    def anthropic_client(self):
+        """Claude via Anthropic."""
+        if self._anthropic_client is None:
+            with self._lock:
+                if self._anthropic_client is None:
+                    from anthropic import Anthropic
+                    self._anthropic_client = Anthropic(api_key=Config.ANTHROPIC_API_KEY)
+        return self._anthropic_client
+
+    @property
+    def gemini_model(self):
+        """Gemini via Google."""
+        if self._gemini_model is None:
+            with self._lock:
+                if self._gemini_model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=Config.GEMINI_API_KEY)
+                    self._gemini_model = genai.GenerativeModel(GEMINI_MODEL)
+        return self._gemini_model
+
+    @property
+    def cache(self) -> ResponseCache:
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    self._cache = ResponseCache(
+                        Config.RESPONSE_CACHE_PATH,
+                        memory_entries=Config.RESPONSE_CACHE_MEMORY_ENTRIES,
+                        max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES
+                    )
+        return self._cache
+
+    def _cached(self, provider, model, prompt, temperature, max_tokens, request, hedge=True):
+        """Serve a call from the response cache or run `request` per the cache mode.
+        
+        Each call is traced as a span and reported as a latency event.
+        """
+        start = time.perf_counter()
+        with tracing.span("llm", provider, model=model, max_tokens=max_tokens):
+            response, cached = self._lookup_or_request(provider, model, prompt, temperature,
+                                                       max_tokens, request, hedge)
+            tracing.annotate(cached=cached, response_chars=len(response or ""))
+        events.emit("llm_call", provider=provider, cached=cached, ok=response is not None,
+                    seconds=round(time.perf_counter() - start, 3))
+        return response
+
+    def _lookup_or_request(self, provider, model, prompt, temperature, max_tokens, request, hedge=True):
+        """Return (response, served_from_cache) according to Config.RESPONSE_CACHE_MODE."""
+        mode = Config.RESPONSE_CACHE_MODE
+        if mode == "off":
+            return self._call_provider(provider, prompt, max_tokens, request, hedge), False
+
+        key = response_cache_key(provider, model, prompt, temperature, max_tokens)
+        if mode in ("on", "replay"):
+            cached = self.cache.get(key)
+            if cached is not None:
+                accounting.record(provider, 0, 0, cached=True)
+                return cached, True
+            if mode == "replay":
+                print(f"{provider} replay miss: no recorded response")
+                tracing.annotate(error="replay miss")
+                return None, False
+
+        response = self._call_provider(provider, prompt, max_tokens, request, hedge)
+        # An empty response (e.g. a stream with no content) is a failure, not an answer to replay
+        if response:
+            self.cache.set(key, response)
+        return response, False
+
+    def _call_provider(self, provider, prompt, max_tokens, request, hedge=True):
+        """Run a provider request with rate limiting, retries and hedging; failures are logged and give None."""
         try:
-            response = self.azure_client.chat.completions.create(
-                model=Config.AZURE_OPENAI_DEPLOYMENT,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
-            return response.choices[0].message.content
+            return resilience.call(provider, request,
+                                   tokens=lambda: accounting.count_tokens(prompt) + max_tokens, hedge=hedge)
         except Exception as e:
-            print(f"GPT-4 error: {e}")
+            print(f"{PROVIDER_LABELS[provider]} error: {e}")
+            tracing.annotate(error=str(e))
             return None
 
+    def gpt4_call(self, messages, temperature=0.7, max_tokens=8000, on_chunk=None):
+        """Query generation and report synthesis.
+        
+        With `on_chunk`, the completion is streamed: each text delta is passed to
+        `on_chunk` as it arrives, and `on_chunk(None)` means a failed stream is
+        being retried and the text so far should be discarded. Streamed calls
+        are never hedged. The full text is returned either way (responses served
+        from the cache are not passed to `on_chunk`).
+        """
+        if on_chunk is None:
+            return self._cached(
+                "gpt4", Config.AZURE_OPENAI_DEPLOYMENT, messages, temperature, max_tokens,
+                lambda: self._gpt4_request(messages, temperature, max_tokens)
+            )
+        attempts = []
+        
+        def request():
+            if attempts:
+                on_chunk(None)
+            attempts.append(True)
+            return self._gpt4_stream_request(messages, temperature, max_tokens, on_chunk)
+        
+        return self._cached("gpt4", Config.AZURE_OPENAI_DEPLOYMENT, messages, temperature,
+                            max_tokens, request, hedge=False)
+
     def claude_call(self, system_prompt, user_message, temperature=0.3, max_tokens=8000):
         """Risk analysis across 6 categories."""
-        try:
-            response = self.anthropic_client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=max_tokens,
-                temperature=temperature,
-                system=system_prompt,
-                messages=[{"role": "user", "content": user_message}]
-            )
-            return response.content[0].text
-        except Exception as e:
-            print(f"Claude error: {e}")
-            return None
+        return self._cached(
+            "claude", CLAUDE_MODEL, [system_prompt, user_message], temperature, max_tokens,
+            lambda: self._claude_request(system_prompt, user_message, temperature, max_tokens)
+        )
 
     def gemini_call(self, prompt, temperature=0.5, max_tokens=4000):
         """Entity and timeline extraction."""
-        try:
-            response = self.gemini_model.generate_content(
-                prompt,
-                generation_config={"temperature": temperature, "max_output_tokens": max_tokens}
-            )
-            return response.text
-        except Exception as e:
-            print(f"Gemini error: {e}")
-            return None
+        return self._cached(
+            "gemini", GEMINI_MODEL, prompt, temperature, max_tokens,
+            lambda: self._gemini_request(prompt, temperature, max_tokens)
+        )
+
+    # Raw provider requests: errors propagate to _call_provider so rate
+    # limiting can recognize throttling
+    def _gpt4_request(self, messages, temperature, max_tokens):
+        response = self.azure_client.chat.completions.create(
+            model=Config.AZURE_OPENAI_DEPLOYMENT,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        content = response.choices[0].message.content
+        usage = response.usage
+        accounting.record(
+            "gpt4",
+            usage.prompt_tokens if usage else accounting.count_tokens(messages),
+            usage.completion_tokens if usage else accounting.count_tokens(content)
+        )
+        return content
+
+    def _gpt4_stream_request(self, messages, temperature, max_tokens, on_chunk):
+        start = time.perf_counter()
+        stream = self.azure_client.chat.completions.create(
+            model=Config.AZURE_OPENAI_DEPLOYMENT,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        parts, usage = [], None
+        for chunk in stream:
+            usage = chunk.usage or usage
+            # Azure sends content-filter chunks without choices
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                if not parts:
+                    tracing.annotate(first_chunk_seconds=round(time.perf_counter() - start, 3))
+                parts.append(delta)
+                on_chunk(delta)
+        content = "".join(parts)
+        accounting.record(
+            "gpt4",
+            usage.prompt_tokens if usage else accounting.count_tokens(messages),
+            usage.completion_tokens if usage else accounting.count_tokens(content)
+        )
+        return content
+
+    def _claude_request(self, system_prompt, user_message, temperature, max_tokens):
+        response = self.anthropic_client.messages.create(
+            model=CLAUDE_MODEL,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system=system_prompt,
+            messages=[{"role": "user", "content": user_message}]
+        )
+        text = response.content[0].text
+        accounting.record("claude", response.usage.input_tokens, response.usage.output_tokens)
+        return text
+
+    def _gemini_request(self, prompt, temperature, max_tokens):
+        response = self.gemini_model.generate_content(
+            prompt,
+            generation_config={"temperature": temperature, "max_output_tokens": max_tokens}
+        )
+        text = response.text
+        usage = getattr(response, "usage_metadata", None)
+        accounting.record(
+            "gemini",
+            usage.prompt_token_count if usage else accounting.count_tokens(prompt),
+            usage.candidates_token_count if usage else accounting.count_tokens(text)
+        )
+        return text
 
 
 models = Models()
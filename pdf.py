@@ -0,0 +1,142 @@
+"""Markdown report to PDF rendering (headings, lists, tables and bold text).
+
+ReportLab is imported on first render, so importing this module stays cheap.
+"""
+import io
+import re
+import threading
+
+# Bump when rendered output changes so cached PDFs are invalidated
+RENDER_VERSION = "2"
+
+_NUMBERED_RE = re.compile(r"\d[.):]")
+# Characters ReportLab's paragraph parser rejects (XML 1.0 forbids them)
+_CONTROL_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_XML_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+_styles = None
+_styles_lock = threading.Lock()
+
+
+def get_styles():
+    """Report paragraph styles, built once per process."""
+    global _styles
+    if _styles is None:
+        with _styles_lock:
+            if _styles is None:
+                from reportlab.lib import colors
+                from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+                styles = getSampleStyleSheet()
+                styles.add(ParagraphStyle(name='Title2', parent=styles['Heading1'], fontSize=24, spaceAfter=30))
+                styles.add(ParagraphStyle(name='H2', parent=styles['Heading2'], fontSize=16, spaceAfter=12, spaceBefore=12))
+                styles.add(ParagraphStyle(name='H3', parent=styles['Heading3'], fontSize=12, spaceAfter=10, spaceBefore=10, textColor=colors.grey))
+                styles.add(ParagraphStyle(name='Body2', parent=styles['Normal'], fontSize=10, spaceAfter=6, leading=14))
+                styles.add(ParagraphStyle(name='List2', parent=styles['Normal'], fontSize=10, spaceAfter=4, leftIndent=20, leading=14))
+                _styles = styles
+    return _styles
+
+
+def escape(text):
+    """Escape text for ReportLab paragraph markup, dropping disallowed control characters."""
+    return _CONTROL_RE.sub("", text).translate(_XML_ESCAPES)
+
+
+def inline_markup(text):
+    """Paragraph markup for a line of markdown: escaped text with **bold** spans.
+
+    Only balanced `**` pairs become <b> tags, so the result is always
+    well-formed and can be handed to Paragraph without a fallback.
+    """
+    parts = text.split("**")
+    if len(parts) % 2 == 0:
+        # Unpaired trailing marker: keep it as literal text
+        parts[-2:] = [parts[-2] + "**" + parts[-1]]
+    return "".join(f"<b>{escape(part)}</b>" if i % 2 else escape(part)
+                   for i, part in enumerate(parts))
+
+
+def _is_separator(cells):
+    return all("--" in c or c == "" for c in cells)
+
+
+def tokenize(markdown_text):
+    """Split markdown into blocks in one pass over its lines.
+
+    Yields (kind, payload): ("blank", None), ("h1"|"h2"|"h3", text),
+    ("bullet"|"numbered"|"text", text) and ("table", rows).
+    """
+    table = []
+    for raw in markdown_text.split("\n"):
+        line = raw.strip()
+        if line.startswith("|"):
+            cells = [c.strip() for c in line.split("|")[1:-1]]
+            if not _is_separator(cells):
+                table.append(cells)
+            continue
+        if table:
+            yield "table", table
+            table = []
+        if not line:
+            yield "blank", None
+        elif line[0] == "#" and line.startswith(("# ", "## ", "### ")):
+            level = line.index(" ")
+            yield f"h{level}", line[level + 1:]
+        elif line.startswith(("- ", "* ")):
+            yield "bullet", line[2:]
+        elif len(line) > 2 and _NUMBERED_RE.match(line):
+            yield "numbered", line
+        else:
+            yield "text", line
+    if table:
+        yield "table", table
+
+
+def build_elements(markdown_text):
+    """Platypus flowables for a markdown report."""
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+
+    styles = get_styles()
+    table_style = TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+    ])
+    heading_styles = {"h1": styles["Title2"], "h2": styles["H2"], "h3": styles["H3"]}
+    elements = []
+    for kind, payload in tokenize(markdown_text):
+        if kind == "blank":
+            elements.append(Spacer(1, 0.1 * inch))
+        elif kind in heading_styles:
+            elements.append(Paragraph(escape(payload), heading_styles[kind]))
+            if kind == "h1":
+                elements.append(Spacer(1, 0.2 * inch))
+        elif kind == "bullet":
+            elements.append(Paragraph("• " + inline_markup(payload), styles["List2"]))
+        elif kind == "numbered":
+            elements.append(Paragraph(inline_markup(payload), styles["List2"]))
+        elif kind == "table":
+            if len(payload) > 1:
+                width = max(len(row) for row in payload)
+                table = Table([[Paragraph(escape(c), styles["Normal"]) for c in row + [""] * (width - len(row))]
+                               for row in payload])
+                table.setStyle(table_style)
+                elements.append(table)
+                elements.append(Spacer(1, 0.2 * inch))
+        else:
+            elements.append(Paragraph(inline_markup(payload), styles["Body2"]))
+    return elements
+
+
+def markdown_to_pdf(markdown_text):
+    """Convert a markdown report to a PDF buffer."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
+    doc.build(build_elements(markdown_text))
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,125 @@
+"""Preloaded preset reports with precompressed JSON bodies and strong ETags."""
+import gzip
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+REQUIRED_FIELDS = {"target": str, "full_report_markdown": str}
+
+
+class PresetEntry:
+    """One preset's parsed data and its serialized bodies, keyed by content encoding."""
+
+    def __init__(self, preset_id: str, data: Dict):
+        self.id = preset_id
+        self.data = data
+        body = json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.bodies = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(body)
+        # Strong validators must differ per representation
+        self.etags = {encoding: digest if encoding == "identity" else f"{digest}-{encoding}"
+                      for encoding in self.bodies}
+
+    @property
+    def markdown(self) -> str:
+        return self.data["full_report_markdown"]
+
+
+def validate(data) -> Optional[str]:
+    """Return why a preset file's contents are unusable, or None if they are fine."""
+    if not isinstance(data, dict):
+        return "top level is not an object"
+    for field, kind in REQUIRED_FIELDS.items():
+        if not isinstance(data.get(field), kind):
+            return f"'{field}' missing or not a {kind.__name__}"
+    return None
+
+
+class PresetIndex:
+    """Preset reports from `directory/*.json`, loaded once and reloaded when files change.
+
+    `fallbacks` maps ids to data served when no valid file exists. The
+    directory is re-scanned at most every `reload_interval` seconds; only
+    files whose mtime or size changed are parsed again. `on_load(entry)` is
+    called for every entry that is (re)built.
+    """
+
+    def __init__(self, directory, fallbacks: Dict[str, Dict] = None, reload_interval: float = 2.0,
+                 on_load: Callable[[PresetEntry], None] = None):
+        self.directory = Path(directory)
+        self.fallbacks = fallbacks or {}
+        self.reload_interval = reload_interval
+        self.on_load = on_load
+        self._entries = {}
+        self._file_entries = {}
+        self._fallback_entries = {}
+        self._signatures = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        """Rescan the directory, rebuilding entries for new or changed files."""
+        with self._lock:
+            self._scan()
+
+    def _scan(self):
+        entries, signatures = {}, {}
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            preset_id = path.stem
+            signature = (stat.st_mtime_ns, stat.st_size)
+            signatures[preset_id] = signature
+            if self._signatures.get(preset_id) == signature:
+                # Unchanged: keep the parsed entry (or stay skipped if it was invalid)
+                if preset_id in self._file_entries:
+                    entries[preset_id] = self._file_entries[preset_id]
+                continue
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Skipping preset {path.name}: {e}")
+                continue
+            problem = validate(data)
+            if problem:
+                print(f"⚠️  Skipping preset {path.name}: {problem}")
+                continue
+            data["report_id"] = preset_id
+            entries[preset_id] = self._build(preset_id, data)
+        file_entries = dict(entries)
+        for preset_id, data in self.fallbacks.items():
+            if preset_id not in entries:
+                if preset_id not in self._fallback_entries:
+                    self._fallback_entries[preset_id] = self._build(preset_id, data)
+                entries[preset_id] = self._fallback_entries[preset_id]
+        self._entries = entries
+        self._file_entries = file_entries
+        self._signatures = signatures
+        self._checked_at = time.monotonic()
+
+    def _build(self, preset_id: str, data: Dict) -> PresetEntry:
+        entry = PresetEntry(preset_id, data)
+        if self.on_load is not None:
+            self.on_load(entry)
+        return entry
+
+    def get(self, preset_id: str) -> Optional[PresetEntry]:
+        if time.monotonic() - self._checked_at > self.reload_interval:
+            with self._lock:
+                if time.monotonic() - self._checked_at > self.reload_interval:
+                    self._scan()
+        return self._entries.get(preset_id)
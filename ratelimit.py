@@ -0,0 +1,225 @@
+"""Adaptive per-provider rate limiting shared by every LLM and search call in the process.
+
+Each provider gets a limiter that combines
+- token buckets for requests/minute and tokens/minute (0 disables either),
+- a concurrency limit adjusted AIMD-style: +1 slot per window of successful
+  calls, halved when the provider throttles us,
+- a cooldown that honors the provider's Retry-After when it throttles.
+
+Calls go through `call(provider, fn, tokens)`, which waits for capacity,
+runs `fn` and retries it when it fails with a rate-limit error.
+"""
+import contextvars
+import email.utils
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import tracing
+from config import Config
+
+_current_slot = contextvars.ContextVar("rate_limit_slot", default=None)
+
+
+class RateLimited(Exception):
+    """A provider kept throttling after all retries."""
+
+
+class TokenBucket:
+    """Capacity refilled continuously at `per_minute`/60 per second."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (requests larger than capacity wait for a full bucket)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self.level -= amount
+
+    def give(self, amount: float):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class ProviderLimiter:
+    """Rate and concurrency limits for one provider."""
+
+    def __init__(self, name: str, rpm: float = 0, tpm: float = 0,
+                 max_concurrency: int = 8, min_concurrency: int = 1):
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(max_concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._cond = threading.Condition()
+        self._calls = 0
+        self._throttled = 0
+        self._waited = 0.0
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until a call may start; returns the seconds spent waiting."""
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = max(self.blocked_until - now,
+                           self.requests.wait_time(1, now) if self.requests else 0.0,
+                           self.tokens.wait_time(tokens, now) if self.tokens and tokens else 0.0)
+                if wait <= 0 and self.in_flight < int(self.concurrency):
+                    break
+                self._cond.wait(wait if wait > 0 else None)
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens and tokens:
+                self.tokens.take(tokens)
+            self.in_flight += 1
+            self._calls += 1
+            waited = time.monotonic() - start
+            self._waited += waited
+        return waited
+
+    def release(self, throttled: bool = False, retry_after: Optional[float] = None):
+        """Finish a call, adapting concurrency to whether the provider throttled it."""
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self._throttled += 1
+                self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+                delay = retry_after if retry_after is not None else Config.RATE_LIMIT_DEFAULT_BACKOFF
+                self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            else:
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+            self._cond.notify_all()
+
+    def adjust_tokens(self, estimated: int, actual: int):
+        """Return tokens reserved by an estimate that the call did not use."""
+        if self.tokens and actual < estimated:
+            with self._cond:
+                self.tokens.give(estimated - actual)
+                self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "calls": self._calls,
+                "throttled": self._throttled,
+                "wait_seconds": round(self._waited, 2),
+                "concurrency": int(self.concurrency),
+                "max_concurrency": self.max_concurrency,
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    """The process-wide limiter for a provider, configured from Config.RATE_LIMITS."""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(provider)
+            if limiter is None:
+                rpm, tpm, concurrency = Config.RATE_LIMITS.get(provider, (0, 0, 8))
+                limiter = ProviderLimiter(provider, rpm=rpm, tpm=tpm, max_concurrency=concurrency)
+                _limiters[provider] = limiter
+    return limiter
+
+
+def stats() -> Dict[str, Dict]:
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.stats() for name, limiter in sorted(limiters.items())}
+
+
+def _parse_retry_after(value) -> Optional[float]:
+    """Seconds from a Retry-After header value (delta seconds or HTTP date)."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def throttle_info(error: Exception) -> Tuple[bool, Optional[float]]:
+    """Whether `error` is a provider rate-limit response, and its Retry-After in seconds.
+
+    Recognizes HTTP 429 from httpx and the OpenAI/Anthropic SDKs (status_code
+    and response headers) and Google's ResourceExhausted (code 429).
+    """
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    code = getattr(error, "code", None)
+    if status != 429 and code != 429 and type(error).__name__ not in ("RateLimitError", "ResourceExhausted"):
+        return False, None
+    headers = getattr(response, "headers", None) or {}
+    retry_after = None
+    if headers.get("retry-after-ms"):
+        try:
+            retry_after = float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if retry_after is None:
+        retry_after = _parse_retry_after(headers.get("retry-after"))
+    return True, retry_after
+
+
+def call(provider: str, fn: Callable, tokens=0):
+    """Run `fn()` within the provider's limits, retrying when it is throttled.
+
+    `tokens` is the call's estimated token usage, or a function computing it
+    (only called when a tokens/minute limit is set). Usage reported through
+    report_usage() while `fn` runs returns any excess to the bucket.
+    Raises RateLimited after Config.RATE_LIMIT_RETRIES throttled attempts.
+    """
+    limiter = get_limiter(provider)
+    if callable(tokens):
+        tokens = tokens() if limiter.tokens else 0
+    last_error = None
+    for attempt in range(Config.RATE_LIMIT_RETRIES + 1):
+        waited = limiter.acquire(tokens)
+        if waited > 0.01:
+            tracing.annotate(rate_limit_wait=round(waited, 3))
+        token = _current_slot.set((limiter, tokens))
+        throttled, retry_after = False, None
+        try:
+            return fn()
+        except Exception as e:
+            throttled, retry_after = throttle_info(e)
+            if not throttled:
+                raise
+            last_error = e
+        finally:
+            # Exactly one release per acquire, even on KeyboardInterrupt/SystemExit
+            _current_slot.reset(token)
+            limiter.release(throttled=throttled, retry_after=retry_after)
+        tracing.annotate(throttled=attempt + 1)
+        print(f"  {provider} rate limited (attempt {attempt + 1}); "
+              f"retrying after {retry_after if retry_after is not None else Config.RATE_LIMIT_DEFAULT_BACKOFF}s")
+    raise RateLimited(f"{provider} still rate limited after {Config.RATE_LIMIT_RETRIES + 1} attempts: {last_error}")
+
+
+def report_usage(input_tokens: int, output_tokens: int):
+    """Reconcile the running call's token estimate with its actual usage."""
+    slot = _current_slot.get()
+    if slot is not None:
+        limiter, estimated = slot
+        limiter.adjust_tokens(estimated, input_tokens + output_tokens)
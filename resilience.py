@@ -0,0 +1,179 @@
+"""Retries, hedged requests and latency percentiles for provider calls.
+
+`call(provider, fn, tokens)` runs `fn` through the provider's rate limiter
+and adds:
+- retries per error class (Config.RETRY_POLICY) with jittered exponential
+  backoff, never sleeping past the call's deadline,
+- hedging for providers in Config.HEDGE_PROVIDERS: once enough latencies are
+  known, an attempt still running after the provider's p95 gets a duplicate
+  request, and whichever finishes first wins,
+- rolling p50/p95/p99 latency per provider, reported by stats().
+"""
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+
+import ratelimit
+import tracing
+from config import Config
+
+TIMEOUT_ERRORS = {"TimeoutException", "APITimeoutError", "TimeoutError", "DeadlineExceeded"}
+CONNECTION_ERRORS = {"NetworkError", "ConnectError", "RemoteProtocolError", "APIConnectionError",
+                     "ConnectionError", "ServiceUnavailable"}
+
+# Hedged attempts run on this pool so the caller can wait on them with a timeout
+_hedge_pool = ThreadPoolExecutor(max_workers=128, thread_name_prefix="hedge")
+
+
+class ProviderStats:
+    """Rolling latency window and retry/hedge counters for one provider."""
+
+    def __init__(self, window: int = 500):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < max(min_samples, 1):
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> Dict:
+        p50, p95, p99 = (self.percentile(q) for q in (0.50, 0.95, 0.99))
+        with self._lock:
+            return {"calls": self.calls, "failures": self.failures, "retries": self.retries,
+                    "hedges": self.hedges, "hedge_wins": self.hedge_wins,
+                    "samples": len(self._latencies), "p50": p50, "p95": p95, "p99": p99}
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def provider_stats(provider: str) -> ProviderStats:
+    stats = _stats.get(provider)
+    if stats is None:
+        with _stats_lock:
+            stats = _stats.setdefault(provider, ProviderStats())
+    return stats
+
+
+def stats() -> Dict[str, Dict]:
+    """Latency percentiles (seconds) and retry/hedge counts per provider."""
+    with _stats_lock:
+        providers = dict(_stats)
+    return {name: s.snapshot() for name, s in sorted(providers.items())}
+
+
+def classify(error: Exception) -> str:
+    """Error class used to look up the retry policy."""
+    if isinstance(error, ratelimit.RateLimited) or ratelimit.throttle_info(error)[0]:
+        return "throttle"
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & TIMEOUT_ERRORS:
+        return "timeout"
+    if names & CONNECTION_ERRORS:
+        return "connection"
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if isinstance(status, int) and status >= 500:
+        return "server"
+    if isinstance(status, int) and status >= 400:
+        return "client"
+    return "other"
+
+
+def backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry number (0-based)."""
+    ceiling = min(Config.RETRY_BACKOFF_MAX, Config.RETRY_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+def _timed(stats: ProviderStats, fn: Callable):
+    start = time.perf_counter()
+    result = fn()
+    stats.observe(time.perf_counter() - start)
+    return result
+
+
+def _attempt(provider: str, fn: Callable, tokens, deadline: float, hedge: bool):
+    """One logical attempt, hedged with a duplicate request if it runs past p95."""
+    stats = provider_stats(provider)
+    request = lambda: ratelimit.call(provider, lambda: _timed(stats, fn), tokens)
+    delay = None
+    if hedge and provider in Config.HEDGE_PROVIDERS:
+        delay = stats.percentile(0.95, min_samples=Config.HEDGE_MIN_SAMPLES)
+    if delay is None or deadline - time.monotonic() < 2 * delay:
+        return request()
+
+    primary = _hedge_pool.submit(contextvars.copy_context().run, request)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+    stats.count(hedges=1)
+    tracing.annotate(hedged=True)
+    hedge = _hedge_pool.submit(contextvars.copy_context().run, request)
+    pending, error = {primary, hedge}, None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                result = future.result()
+            except Exception as e:
+                error = e
+                continue
+            if future is hedge:
+                stats.count(hedge_wins=1)
+                tracing.annotate(hedge_won=True)
+            return result
+    raise error
+
+
+def call(provider: str, fn: Callable, tokens=0, deadline: float = None, hedge: bool = True):
+    """Run `fn()` for `provider` with rate limiting, retries and hedging.
+
+    `deadline` is the total seconds allowed including retries (default:
+    Config.CALL_DEADLINES for the provider). Raises the last error once the
+    retry policy for its class is exhausted or the deadline is near. Pass
+    `hedge=False` for calls that must not run twice at once (e.g. streams).
+    """
+    stats = provider_stats(provider)
+    stats.count(calls=1)
+    deadline = time.monotonic() + (deadline or Config.CALL_DEADLINES.get(provider, 180))
+    retries = {}
+    while True:
+        try:
+            return _attempt(provider, fn, tokens, deadline, hedge)
+        except Exception as e:
+            error_class = classify(e)
+            attempt = retries.get(error_class, 0)
+            delay = backoff(attempt)
+            typical = stats.percentile(0.5) or 0.0
+            if attempt >= Config.RETRY_POLICY.get(error_class, 0) \
+                    or time.monotonic() + delay + typical > deadline:
+                stats.count(failures=1)
+                raise
+            retries[error_class] = attempt + 1
+            stats.count(retries=1)
+            tracing.annotate(retries=sum(retries.values()), last_error=f"{error_class}: {e}")
+            print(f"  {provider} {error_class} error, retry {attempt + 1} in {delay:.1f}s: {e}")
+            time.sleep(delay)
@@ -0,0 +1,83 @@
+"""Lexical relevance ranking (BM25) for packing findings into prompt budgets."""
+import math
+import re
+from collections import Counter
+from typing import Dict, List
+
+from accounting import count_tokens
+from findings import render_findings
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def record_text(record: Dict) -> str:
+    """Searchable text of a source record; the query gives citation-only records context."""
+    return " ".join((record.get("query", ""), record.get("title", ""),
+                     record.get("url", ""), record.get("snippet", "")))
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents."""
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_terms = [Counter(tokenize(doc)) for doc in documents]
+        self.doc_lengths = [sum(terms.values()) for terms in self.doc_terms]
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0
+        doc_freq = Counter(term for terms in self.doc_terms for term in terms)
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def scores(self, query: str) -> List[float]:
+        query_terms = set(tokenize(query))
+        scores = []
+        for terms, length in zip(self.doc_terms, self.doc_lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_length) if self.avg_length else self.k1
+            score = 0.0
+            for term in query_terms:
+                tf = terms.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+
+def pack_context(records: List[Dict], task: str, token_budget: int) -> str:
+    """Render the records most relevant to `task` that fit within `token_budget`.
+
+    Records are chosen greedily by BM25 score (ties favor later depths), then
+    rendered in their original order so the prompt still reads chronologically.
+    """
+    if not records:
+        return ""
+    scores = BM25Index([record_text(r) for r in records]).scores(task)
+    ranked = sorted(range(len(records)), key=lambda i: (scores[i], i), reverse=True)
+
+    chosen, used = [], 0
+    for i in ranked:
+        cost = count_tokens(record_text(records[i])) + 8
+        if used + cost > token_budget:
+            continue
+        chosen.append(i)
+        used += cost
+    return render_findings(records[i] for i in sorted(chosen))
+
+
+def chunk_records(records: List[Dict], token_budget: int) -> List[List[Dict]]:
+    """Split records, in order, into consecutive groups that each fit the budget."""
+    chunks, current, used = [], [], 0
+    for record in records:
+        cost = count_tokens(record_text(record)) + 8
+        if current and used + cost > token_budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(record)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,51 @@
+"""Per-run log files for output printed by concurrently running research."""
+import contextvars
+import sys
+
+# (log file, echo to console) of the run printing in the current context
+_log_target = contextvars.ContextVar("log_target", default=None)
+
+
+class LogCapture:
+    """Tee stdout to the console and to the log file of the run printing it.
+    
+    Installed once as sys.stdout; each run binds its own log file through a
+    context variable, so concurrent runs never write into each other's logs.
+    Runs bound with echo=False write to their log file only.
+    """
+    def __init__(self, terminal):
+        self.terminal = terminal
+    
+    def write(self, message):
+        target = _log_target.get()
+        if target is None:
+            return self.terminal.write(message)
+        log, echo = target
+        if echo:
+            self.terminal.write(message)
+        return log.write(message)
+    
+    def flush(self):
+        self.terminal.flush()
+        target = _log_target.get()
+        if target is not None:
+            target[0].flush()
+    
+    def __getattr__(self, name):
+        return getattr(self.terminal, name)
+
+
+def install():
+    """Route stdout through LogCapture once per process."""
+    if not isinstance(sys.stdout, LogCapture):
+        sys.stdout = LogCapture(sys.stdout)
+
+
+def bind(log, echo: bool = True):
+    """Send output printed in the current context to `log`; returns a reset token."""
+    install()
+    return _log_target.set((log, echo))
+
+
+def unbind(token):
+    _log_target.reset(token)
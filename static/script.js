@@ -65,18 +65,25 @@ function runResearch(data, resultsContainerId) {
     submitBtn.querySelector('.btn-loader').style.display = 'inline-flex';
     submitBtn.disabled = true;
     
+    const resetButton = () => {
+        submitBtn.querySelector('.btn-text').style.display = 'inline';
+        submitBtn.querySelector('.btn-loader').style.display = 'none';
+        submitBtn.disabled = false;
+    };
+    
     fetch('/research', {
         method: 'POST',
         headers: {'Content-Type': 'application/x-www-form-urlencoded'},
         body: new URLSearchParams(data)
     })
     .then(res => res.json())
-    .then(result => {
-        if (result.error) {
-            alert('Error: ' + result.error);
-            return;
+    .then(job => {
+        if (job.error) {
+            throw new Error(job.error);
         }
-        
+        return followProgress(job.job_id, resultsContainer);
+    })
+    .then(result => {
         displayResults(result, resultsContainer);
         resultsContainer.style.display = 'block';
     })
@@ -84,10 +91,114 @@ function runResearch(data, resultsContainerId) {
         console.error(err);
         alert('Research failed: ' + err.message);
     })
-    .finally(() => {
-        submitBtn.querySelector('.btn-text').style.display = 'inline';
-        submitBtn.querySelector('.btn-loader').style.display = 'none';
-        submitBtn.disabled = false;
+    .finally(resetButton);
+}
+
+// Describe a progress event in one line, or return null to skip it
+function describeEvent(type, data) {
+    switch (type) {
+        case 'node_started':
+            return data.node === 'search' ? `Depth ${data.depth + 1}: generating queries...` : null;
+        case 'queries':
+            return `Depth ${data.depth}: running ${data.queries.length} searches` +
+                (data.skipped.length ? ` (${data.skipped.length} duplicates skipped)` : '');
+        case 'sources':
+            return `Depth ${data.depth}: ${data.new_sources} new sources (${data.total_sources} total)`;
+        case 'entities':
+            return `Entities: ${data.people} people, ${data.organizations} orgs, ${data.events} events`;
+        case 'risk':
+            return `Depth ${data.depth}: risk score ${data.total_risk_score}/100`;
+        case 'llm_call':
+            return `${data.provider} responded in ${data.seconds}s${data.cached ? ' (cached)' : ''}`;
+        case 'node_completed':
+            return data.node === 'report' ? 'Report complete' : null;
+        default:
+            return null;
+    }
+}
+
+// Show live progress from the job's event stream, then resolve with its result
+function followProgress(jobId, container) {
+    if (!window.EventSource) {
+        return waitForResult(jobId);
+    }
+    container.innerHTML = '<div class="progress-log"></div>' +
+        '<div class="report-preview report-content" style="display:none;"></div>';
+    container.style.display = 'block';
+    const log = container.querySelector('.progress-log');
+    const preview = container.querySelector('.report-preview');
+    let reportText = '';
+    let renderPending = false;
+    
+    // Render the streamed report at most once per animation frame
+    const renderPreview = () => {
+        renderPending = false;
+        preview.innerHTML = marked.parse(reportText);
+    };
+    
+    return new Promise((resolve, reject) => {
+        // A failed or cancelled run leaves no report, so drop the partial preview
+        const fail = error => {
+            reportText = '';
+            preview.innerHTML = '';
+            preview.style.display = 'none';
+            reject(error);
+        };
+        const source = new EventSource('/research/' + jobId + '/events');
+        const append = (type, e) => {
+            const line = describeEvent(type, JSON.parse(e.data));
+            if (line) {
+                const item = document.createElement('div');
+                item.textContent = line;
+                log.appendChild(item);
+                log.scrollTop = log.scrollHeight;
+            }
+        };
+        ['node_started', 'queries', 'sources', 'entities', 'risk', 'llm_call', 'node_completed']
+            .forEach(type => source.addEventListener(type, e => append(type, e)));
+        source.addEventListener('report_chunk', e => {
+            const data = JSON.parse(e.data);
+            reportText = data.reset ? '' : reportText + data.text;
+            preview.style.display = 'block';
+            if (!renderPending) {
+                renderPending = true;
+                requestAnimationFrame(renderPreview);
+            }
+        });
+        source.addEventListener('job', e => {
+            const status = JSON.parse(e.data).status;
+            if (status === 'running') {
+                return;
+            }
+            source.close();
+            waitForResult(jobId, 500).then(resolve, fail);
+        });
+        source.onerror = () => {
+            // Fall back to polling if the stream drops
+            source.close();
+            waitForResult(jobId).then(resolve, fail);
+        };
+    });
+}
+
+// Poll a research job until it finishes, then resolve with its result
+function waitForResult(jobId, intervalMs = 3000) {
+    return new Promise((resolve, reject) => {
+        const poll = () => {
+            fetch('/research/' + jobId + '/result')
+                .then(res => res.json().then(body => ({status: res.status, body})))
+                .then(({status, body}) => {
+                    if (status === 202) {
+                        setTimeout(poll, intervalMs);
+                    } else if (status === 200) {
+                        resolve(body);
+                    } else {
+                        reject(new Error(body.error || 'Research ' + body.status));
+                    }
+                })
+                .catch(reject);
+        };
+        poll();
     });
 }
 
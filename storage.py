@@ -0,0 +1,224 @@
+"""Bounded storage for the web app: markdown reports and rendered files, spilled to disk."""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+_SAFE_NAME_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]{0,200}")
+
+
+def safe_report_name(name: str) -> Optional[str]:
+    """Return `name` if it is a plain file name we can store under, else None."""
+    if not name or not _SAFE_NAME_RE.fullmatch(name) or ".." in name:
+        return None
+    return name
+
+
+class ReportStore:
+    """Markdown reports keyed by download name.
+
+    Every report is written to `directory` so it survives eviction and
+    restarts; only the most recently used ones, up to `memory_bytes` of text,
+    are also held in memory. Files older than `ttl` seconds and the oldest
+    files beyond `max_files` are deleted. Safe to share between threads.
+    """
+
+    def __init__(self, directory, memory_bytes: int = 32 * 1024 * 1024,
+                 max_files: int = 5000, ttl: Optional[float] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.memory_bytes = memory_bytes
+        self.max_files = max_files
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_reads = 0
+        self._misses = 0
+        self._evictions = 0
+        self._writes = 0
+
+    def _path(self, name: str) -> Optional[Path]:
+        name = safe_report_name(name)
+        if name is None:
+            return None
+        return self.directory / (name if name.endswith(".md") else f"{name}.md")
+
+    def put(self, name: str, markdown: str):
+        """Store a report; raises ValueError for names that are not safe file names."""
+        path = self._path(name)
+        if path is None:
+            raise ValueError(f"Invalid report name: {name!r}")
+        markdown = markdown or ""
+        with self._lock:
+            unchanged = self._memory.get(name) == markdown and path.exists()
+            self._remember(name, markdown)
+        if unchanged:
+            return
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_text(markdown, encoding="utf-8")
+        os.replace(tmp, path)
+        with self._lock:
+            self._writes += 1
+            if self._writes % 100 == 1:
+                self._prune_files()
+
+    def get(self, name: str) -> Optional[str]:
+        """Return the report text, loading it from disk if it was evicted."""
+        path = self._path(name)
+        if path is None:
+            return None
+        with self._lock:
+            if name in self._memory:
+                self._memory.move_to_end(name)
+                self._hits += 1
+                return self._memory[name]
+        try:
+            if self.ttl and time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink()
+                raise FileNotFoundError(path)
+            markdown = path.read_text(encoding="utf-8")
+        except OSError:
+            with self._lock:
+                self._misses += 1
+            return None
+        with self._lock:
+            self._disk_reads += 1
+            self._remember(name, markdown)
+        return markdown
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def _remember(self, name: str, markdown: str):
+        """Add to the memory tier and evict LRU entries over the byte cap (lock held)."""
+        if name in self._memory:
+            self._memory_size -= len(self._memory.pop(name))
+        if len(markdown) > self.memory_bytes:
+            return
+        self._memory[name] = markdown
+        self._memory_size += len(markdown)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+            self._evictions += 1
+
+    def _prune_files(self):
+        """Delete expired files and the oldest ones beyond max_files (lock held)."""
+        files = []
+        now = time.time()
+        for path in self.directory.glob("*.md"):
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            if self.ttl and now - mtime > self.ttl:
+                self._drop(path)
+            else:
+                files.append((mtime, path))
+        files.sort()
+        for _, path in files[:max(len(files) - self.max_files, 0)]:
+            self._drop(path)
+
+    def _drop(self, path: Path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        for name in (path.name, path.stem):
+            if name in self._memory:
+                self._memory_size -= len(self._memory.pop(name))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "memory_hits": self._hits,
+                "disk_reads": self._disk_reads,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+            }
+
+
+class FileCache:
+    """Binary blobs (e.g. rendered PDFs) keyed by content hash, bounded by total size.
+
+    Each entry is one file in `directory`; reads refresh its mtime, and the
+    least recently used files are deleted once the total exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory, max_bytes: int = 256 * 1024 * 1024, suffix: str = ".bin"):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._size = sum(p.stat().st_size for p in self.directory.glob(f"*{suffix}"))
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _path(self, key: str) -> Path:
+        if not re.fullmatch(r"[0-9a-f]{16,128}", key):
+            raise ValueError(f"Invalid cache key: {key!r}")
+        return self.directory / f"{key}{self.suffix}"
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._misses += 1
+            return None
+        with self._lock:
+            self._hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        with self._lock:
+            try:
+                self._size -= path.stat().st_size
+            except OSError:
+                pass
+            os.replace(tmp, path)
+            self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete least recently used files until under the size cap (lock held)."""
+        files = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        for _, size, path in files:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            self._size -= size
+            self._evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses,
+                    "evictions": self._evictions, "bytes": self._size}
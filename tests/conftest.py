@@ -0,0 +1,33 @@
+"""Shared test setup: import the top-level modules and keep outputs in a temp dir."""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+for key in ("AZURE_OPENAI_KEY", "AZURE_OPENAI_ENDPOINT", "ANTHROPIC_API_KEY",
+            "GEMINI_API_KEY", "PERPLEXITY_API_KEY"):
+    os.environ.setdefault(key, "test")
+
+import pytest  # noqa: E402
+
+from config import Config  # noqa: E402
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    """Point every output path in Config at a temporary directory."""
+    monkeypatch.setattr(Config, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(Config, "REPORTS_DIR", tmp_path / "reports")
+    monkeypatch.setattr(Config, "LOGS_DIR", tmp_path / "logs")
+    monkeypatch.setattr(Config, "WEB_REPORTS_DIR", tmp_path / "reports" / "web")
+    monkeypatch.setattr(Config, "PDF_CACHE_DIR", tmp_path / "pdf_cache")
+    monkeypatch.setattr(Config, "CHECKPOINT_PATH", tmp_path / "checkpoints.sqlite3")
+    monkeypatch.setattr(Config, "SEARCH_CACHE_PATH", tmp_path / "search_cache.sqlite3")
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_PATH", tmp_path / "response_cache.sqlite3")
+    monkeypatch.setattr(Config, "SEARCH_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_MODE", "off")
+    for key in ("AZURE_OPENAI_KEY", "AZURE_OPENAI_ENDPOINT", "ANTHROPIC_API_KEY",
+                "GEMINI_API_KEY", "PERPLEXITY_API_KEY"):
+        monkeypatch.setattr(Config, key, getattr(Config, key) or "test")
+    return tmp_path
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from config import Config
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_importing_the_web_app_writes_nothing_and_starts_no_threads(tmp_path):
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    result = subprocess.run(
+        [sys.executable, "-c", "import threading, app; print(threading.active_count())"],
+        cwd=tmp_path, env=env, capture_output=True, text=True, check=True, timeout=60)
+    assert result.stdout.strip().splitlines()[-1] == "1"
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("target", ["José Ramírez", "(Jane) Doe", "Jane Doe " * 40, "李明"])
+def test_report_download_name_is_safe_for_any_target(target, output_dir, monkeypatch):
+    import app
+
+    monkeypatch.chdir(output_dir)
+    monkeypatch.setattr(app, "_stores", {})
+    monkeypatch.setattr(app, "_prerender_pdf", lambda markdown: None)
+    monkeypatch.setattr(app, "run_research", lambda target, **kwargs: {
+        "target": target, "final_report": "# Report", "risk_analysis": "{}", "entities": "{}",
+        "run_id": kwargs["run_id"]})
+    job = SimpleNamespace(id="0123456789abcdef", cancel_event=threading.Event(),
+                          params={"target": target, "run_id": "run-1"})
+
+    result = app._run_research_job(job)
+    assert app.get_reports().get(result["report_file"]) == "# Report"
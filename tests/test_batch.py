@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+import batch
+
+
+def _state(target, report, error=""):
+    return {"target": target, "final_report": report, "error": error,
+            "risk_analysis": json.dumps({"total_risk_score": 40}), "entities": "{}",
+            "num_sources": 3, "completed_depth": 1, "stop_reason": "", "usage": {"spent": 0.5}}
+
+
+def test_failed_report_is_recorded_as_failed_and_retried_on_resume(output_dir, tmp_path, monkeypatch):
+    targets = tmp_path / "targets.csv"
+    targets.write_text("target\nJane Doe\nJohn Roe\n")
+    calls = []
+
+    def fake_run(target, **kwargs):
+        calls.append(target)
+        if target == "John Roe" and calls.count(target) == 1:
+            return _state(target, "", error="Report generation failed")
+        return _state(target, f"# {target}\n\nReport.")
+
+    monkeypatch.setattr(batch, "run_research", fake_run)
+    first = batch.run_batch(targets, workers=1, output_dir=tmp_path / "out")
+    assert (first["completed"], first["failed"]) == (1, 1)
+
+    manifest = [json.loads(line) for line in (tmp_path / "out" / "manifest.jsonl").read_text().splitlines()]
+    assert {e["target"]: e["status"] for e in manifest} == {"Jane Doe": "completed", "John Roe": "failed"}
+
+    second = batch.run_batch(targets, workers=1, resume=True, output_dir=tmp_path / "out")
+    assert (second["skipped"], second["completed"], second["failed"]) == (1, 1, 0)
+    assert calls == ["Jane Doe", "John Roe", "John Roe"]
+
+
+def test_excel_csv_with_byte_order_mark_is_read(tmp_path):
+    targets = tmp_path / "targets.csv"
+    targets.write_bytes("target,location\r\nJosé Ramírez,Madrid\r\n".encode("utf-8-sig"))
+    rows = batch.load_targets(targets)
+    assert [(r["target"], r["location"]) for r in rows] == [("José Ramírez", "Madrid")]
+
+
+@pytest.mark.parametrize("content", ["name,location\nJane Doe,London\n", "target\n\n ,\n"])
+def test_file_without_targets_is_rejected(tmp_path, content):
+    targets = tmp_path / "targets.csv"
+    targets.write_text(content)
+    with pytest.raises(ValueError):
+        batch.load_targets(targets)
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+import agent
+import batch
+import checkpoints
+import events
+from config import Config
+from models import Models
+
+
+class ServiceUnavailable(Exception):
+    status_code = 503
+
+
+@pytest.fixture
+def stub_providers(output_dir, monkeypatch):
+    """Canned provider responses; search calls are counted, the report can be made to fail."""
+    searches = []
+    report = {"fail": False}
+
+    def gpt4(self, messages, temperature, max_tokens):
+        depth = len(searches) + 1
+        return json.dumps([f"Jane Target topic {depth} {i}" for i in range(3)])
+
+    def gpt4_stream(self, messages, temperature, max_tokens, on_chunk):
+        if report["fail"]:
+            on_chunk("# Rep")
+            raise ServiceUnavailable("service unavailable")
+        on_chunk("# Report\n\nText.")
+        return "# Report\n\nText."
+
+    def search(queries, max_results_per_query=5):
+        searches.append(list(queries))
+        return {q: [{"url": f"https://example.com/{len(searches)}/{i}", "title": "Source",
+                     "snippet": f"Finding about {q}"}] for i, q in enumerate(queries)}
+
+    monkeypatch.setattr(Models, "_gpt4_request", gpt4)
+    monkeypatch.setattr(Models, "_gpt4_stream_request", gpt4_stream)
+    monkeypatch.setattr(Models, "_claude_request",
+                        lambda self, *args: json.dumps({"total_risk_score": 40}))
+    monkeypatch.setattr(Models, "_gemini_request",
+                        lambda self, *args: json.dumps({"people": [{"name": "Jane Doe"}]}))
+    monkeypatch.setattr(agent, "batch_search", search)
+    monkeypatch.setattr(Config, "RETRY_POLICY", {})
+    monkeypatch.setattr(Config, "ADAPTIVE_DEPTH", False)
+    monkeypatch.setattr(Config, "CHECKPOINTS_ENABLED", True)
+    monkeypatch.setattr(checkpoints, "_checkpointer", None)
+    agent._compiled_graphs.clear()
+    yield searches, report
+    agent._compiled_graphs.clear()
+    checkpoints._checkpointer = None
+
+
+def test_failed_report_keeps_checkpoints_and_resume_only_reruns_report(stub_providers):
+    searches, report = stub_providers
+    report["fail"] = True
+    state = agent.run_research("Jane Target", max_depth=2, run_id="run-1")
+    assert state["final_report"] == ""
+    assert state["error"] == "Report generation failed"
+    assert state["completed_depth"] == 2
+    assert len(searches) == 2
+    assert [run["run_id"] for run in checkpoints.list_runs()] == ["run-1"]
+
+    report["fail"] = False
+    resumed = agent.resume_research("run-1")
+    assert resumed["final_report"] == "# Report\n\nText."
+    assert not resumed["error"]
+    assert len(searches) == 2
+    assert checkpoints.list_runs() == []
+
+
+def test_failed_report_stream_resets_partial_text(stub_providers):
+    _, report = stub_providers
+    report["fail"] = True
+    stream = events.EventStream()
+    token = events.bind(stream)
+    try:
+        agent.run_research("Jane Target", max_depth=1, run_id="run-2")
+    finally:
+        events.unbind(token)
+    chunks = [e["data"] for e in stream._events if e["type"] == "report_chunk"]
+    assert chunks and chunks[-1] == {"text": "", "reset": True}
+
+
+def test_failed_report_without_checkpoints_keeps_the_research(stub_providers, monkeypatch):
+    _, report = stub_providers
+    report["fail"] = True
+    monkeypatch.setattr(Config, "CHECKPOINTS_ENABLED", False)
+    state = agent.run_research("Jane Target", max_depth=2, run_id="run-3")
+    assert state["final_report"] == ""
+    assert state["error"] == "Report generation failed"
+    assert state["num_sources"] > 0 and state["findings"]
+    assert json.loads(state["risk_analysis"])["total_risk_score"] == 40
+
+
+def test_empty_streamed_report_is_not_cached(stub_providers, monkeypatch):
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_MODE", "on")
+    monkeypatch.setattr(agent.models, "_cache", None)
+    monkeypatch.setattr(Models, "_gpt4_stream_request", lambda self, *args: "")
+    state = agent.run_research("Jane Target", max_depth=1, run_id="run-4")
+    assert state["error"] == "Report generation failed"
+
+    monkeypatch.setattr(Models, "_gpt4_stream_request", lambda self, messages, temperature, max_tokens,
+                        on_chunk: "# Report\n\nText.")
+    assert agent.resume_research("run-4")["final_report"] == "# Report\n\nText."
+
+
+def test_resumed_batch_continues_failed_targets_from_their_checkpoints(stub_providers, tmp_path):
+    searches, report = stub_providers
+    targets = tmp_path / "targets.csv"
+    targets.write_text("target,depth\nJane Target,2\n")
+    report["fail"] = True
+    first = batch.run_batch(targets, workers=1, output_dir=tmp_path / "out")
+    assert first["failed"] == 1 and len(searches) == 2
+
+    entry = json.loads((tmp_path / "out" / "manifest.jsonl").read_text())
+    assert [run["run_id"] for run in checkpoints.list_runs()] == [entry["run_id"]]
+
+    report["fail"] = False
+    second = batch.run_batch(targets, workers=1, resume=True, output_dir=tmp_path / "out")
+    assert second["completed"] == 1
+    assert len(searches) == 2
+    assert checkpoints.list_runs() == []
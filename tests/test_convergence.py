@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+import agent
+from config import Config
+from findings import new_findings
+from models import Models
+
+QUERIES = ["Jane Doe fraud verdict", "Jane Doe board members"]
+
+
+@pytest.fixture
+def depth_two_state():
+    """State after a first depth that found sources and scored the risk."""
+    return {"target": "Jane Doe", "depth": 1, "max_depth": 5, "executed_queries": [],
+            "findings": new_findings([], {"Jane Doe": [
+                {"url": "https://example.com/1", "title": "Source", "snippet": "Finding"}]}, depth=1),
+            "entities": "", "risk_analysis": json.dumps({"total_risk_score": 40}),
+            "depth_yield": [{"depth": 1, "entities": None, "risk_score": 40.0}]}
+
+
+def _after_search(state, update):
+    return {**state, **update, "findings": state["findings"] + update.get("findings", [])}
+
+
+def test_depth_whose_searches_all_failed_does_not_converge(depth_two_state, monkeypatch):
+    monkeypatch.setattr(Models, "_gpt4_request", lambda self, *args: json.dumps(QUERIES))
+    monkeypatch.setattr(agent, "batch_search", lambda qs, max_results_per_query=5: {
+        q: [{"url": "error", "title": "Search Error", "snippet": "service unavailable"}] for q in qs})
+    state = _after_search(depth_two_state, agent.search_node(depth_two_state))
+
+    yield_ = agent._depth_yield(state)
+    assert yield_["search_failed"] and yield_["searches_succeeded"] == 0
+    assert not agent._converged(yield_)
+    assert "stop_reason" not in agent.join_node(state)
+
+
+def test_depth_whose_query_generation_failed_does_not_converge(depth_two_state, monkeypatch):
+    monkeypatch.setattr(Models, "_gpt4_request", lambda self, *args: None)
+    monkeypatch.setattr(Config, "RETRY_POLICY", {})
+    state = _after_search(depth_two_state, agent.search_node(depth_two_state))
+    assert not agent._converged(agent._depth_yield(state))
+
+
+def test_depth_with_nothing_new_converges(depth_two_state, monkeypatch):
+    monkeypatch.setattr(Models, "_gpt4_request", lambda self, *args: json.dumps(QUERIES))
+    monkeypatch.setattr(agent, "batch_search", lambda qs, max_results_per_query=5: {
+        q: [{"url": "https://example.com/1", "title": "Source", "snippet": ""}] for q in qs})
+    state = _after_search(depth_two_state, agent.search_node(depth_two_state))
+
+    yield_ = agent._depth_yield(state)
+    assert yield_["searches_succeeded"] == 2 and not yield_["search_failed"]
+    assert agent.join_node(state)["stop_reason"] == "converged"
@@ -0,0 +1,27 @@
+from findings import new_findings
+
+
+def test_answers_citing_the_same_source_are_all_kept():
+    results = {
+        "Jane Doe fraud verdict": [
+            {"url": "https://news.example/jane", "title": "Source 1", "snippet": "Jury convicted her."},
+            {"url": "https://court.example/case", "title": "Source 2", "snippet": ""},
+        ],
+        "Jane Doe sentencing": [
+            {"url": "https://news.example/jane", "title": "Source 1", "snippet": "Sentenced to 11 years."},
+            {"url": "https://court.example/case", "title": "Source 2", "snippet": ""},
+        ],
+    }
+    records = new_findings([], results, depth=1)
+    snippets = [r["snippet"] for r in records if r["url"] == "https://news.example/jane"]
+    assert snippets == ["Jury convicted her.", "Sentenced to 11 years."]
+    # A bare citation repeated by the second query adds nothing
+    assert [r["url"] for r in records].count("https://court.example/case") == 1
+
+
+def test_repeated_answers_and_citations_across_depths_are_dropped():
+    first = new_findings([], {"q1": [{"url": "https://a.example", "snippet": "Same text."}]}, depth=1)
+    again = new_findings(first, {"q2": [{"url": "https://a.example", "snippet": "Same text."},
+                                        {"url": "https://a.example", "snippet": ""},
+                                        {"url": "error", "snippet": "boom"}]}, depth=2)
+    assert again == []
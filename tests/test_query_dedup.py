@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+import agent
+from models import Models
+from tools import dedupe_queries
+
+TARGET = "Elizabeth Holmes"
+
+
+@pytest.mark.parametrize("earlier, candidate", [
+    ("Elizabeth Holmes fraud verdict", "Elizabeth Holmes fraud sentencing"),
+    ("Elizabeth Holmes fraud", "Elizabeth Holmes fraud verdict"),
+    ("Elizabeth Holmes Theranos lawsuit", "Elizabeth Holmes Theranos investors lawsuit"),
+    ("Elizabeth Holmes SEC settlement", "Elizabeth Holmes SEC investigation"),
+    ("Elizabeth Holmes Theranos board members", "Elizabeth Holmes Theranos board resignations"),
+    ("Holmes wire fraud trial 2022", "Holmes wire fraud appeal 2023"),
+])
+def test_distinct_investigative_queries_are_kept(earlier, candidate):
+    to_run, skipped = dedupe_queries([candidate], [earlier], TARGET)
+    assert to_run == [candidate] and skipped == []
+
+
+@pytest.mark.parametrize("earlier, candidate", [
+    ("Elizabeth Holmes lawsuits", "Elizabeth Holmes lawsuit"),
+    ("Elizabeth Holmes Theranos fraud charges", "Theranos fraud charges against Elizabeth Holmes"),
+    ("Elizabeth Holmes SEC fraud charges", "SEC fraud charges Elizabeth Holmes 2018"),
+])
+def test_rephrased_queries_are_skipped(earlier, candidate):
+    to_run, skipped = dedupe_queries([candidate], [earlier], TARGET)
+    assert to_run == [] and skipped == [candidate]
+
+
+def test_failed_searches_are_not_recorded_as_executed(monkeypatch):
+    queries = ["Jane Doe fraud verdict", "Jane Doe board members"]
+    monkeypatch.setattr(Models, "_gpt4_request", lambda self, *args: json.dumps(queries))
+    monkeypatch.setattr(agent, "batch_search", lambda qs, max_results_per_query=5: {
+        queries[0]: [{"url": "https://example.com/verdict", "title": "Source 1", "snippet": "Guilty."}],
+        queries[1]: [{"url": "error", "title": "Search Error", "snippet": "timed out"}],
+    })
+    update = agent.search_node({"target": "Jane Doe", "depth": 0, "max_depth": 2, "findings": [],
+                                "executed_queries": []})
+    assert update["executed_queries"] == [queries[0]]
@@ -0,0 +1,42 @@
+import pytest
+
+import ratelimit
+from config import Config
+
+
+class TooManyRequests(Exception):
+    status_code = 429
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(ratelimit, "_limiters", {})
+    monkeypatch.setattr(Config, "RATE_LIMITS", {"test": (0, 0, 4)})
+    monkeypatch.setattr(Config, "RATE_LIMIT_DEFAULT_BACKOFF", 0)
+    return ratelimit.get_limiter("test")
+
+
+@pytest.mark.parametrize("error", [KeyboardInterrupt, SystemExit, ValueError])
+def test_slot_is_released_when_the_call_raises(limiter, error):
+    def fail():
+        raise error()
+
+    with pytest.raises(error):
+        ratelimit.call("test", fail)
+    assert limiter.in_flight == 0
+    assert limiter.concurrency == 4
+
+
+def test_throttled_attempts_release_their_slot_and_retry(limiter):
+    attempts = []
+
+    def flaky():
+        attempts.append(limiter.in_flight)
+        if len(attempts) < 3:
+            raise TooManyRequests()
+        return "ok"
+
+    assert ratelimit.call("test", flaky) == "ok"
+    assert attempts == [1, 1, 1]
+    assert limiter.in_flight == 0
+    assert limiter.stats()["throttled"] == 2
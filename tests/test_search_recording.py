@@ -0,0 +1,36 @@
+import pytest
+
+import tools
+from config import Config
+from models import models
+
+
+@pytest.fixture
+def search_stub(output_dir, monkeypatch):
+    """Fresh caches under the temp dir and a Perplexity request returning the current answer."""
+    answer = {"content": "Recorded answer."}
+    monkeypatch.setattr(models, "_cache", None)
+    monkeypatch.setattr(tools, "_search_cache", None)
+    monkeypatch.setattr(tools, "_perplexity_request",
+                        lambda query: (answer["content"], ["https://example.com/a"]))
+    yield answer
+    models._cache = None
+    tools._search_cache = None
+
+
+def test_replay_serves_recorded_searches_after_the_search_cache_changes(search_stub, monkeypatch):
+    query = "Jane Doe fraud verdict"
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_MODE", "record")
+    assert tools.perplexity_search(query)[0]["snippet"] == "Recorded answer."
+
+    # Ordinary runs refresh, expire and evict search cache entries
+    search_stub["content"] = "Fresh answer."
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_MODE", "off")
+    monkeypatch.setattr(Config, "SEARCH_CACHE_ENABLED", True)
+    tools.get_search_cache().clear()
+    assert tools.perplexity_search(query)[0]["snippet"] == "Fresh answer."
+
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_MODE", "replay")
+    search_stub["content"] = "Network call in replay."
+    assert tools.perplexity_search(query)[0]["snippet"] == "Recorded answer."
+    assert tools.perplexity_search("never recorded")[0]["url"] == "error"
@@ -1,39 +1,197 @@
 """Web search tools using Perplexity API."""
-import requests
-from typing import List, Dict
+import contextvars
+import hashlib
+import importlib.util
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple
+import accounting
+import events
+import resilience
+import tracing
+from cache import DiskCache
 from config import Config
+from models import models, response_cache_key
+
+PERPLEXITY_URL = "https://api.perplexity.ai/chat/completions"
+PERPLEXITY_MODEL = "sonar-pro"
+SEARCH_RECENCY_FILTER = "month"
+
+# Results for a recency-filtered query drift as the window slides, so the
+# cache TTL is scaled to the window and capped by SEARCH_CACHE_TTL.
+RECENCY_TTL = {"hour": 300, "day": 3600, "week": 6 * 3600, "month": 24 * 3600, "year": 7 * 24 * 3600}
+
+
+class SearchClient:
+    """Long-lived, pooled HTTP client for the Perplexity API.
+
+    Connections are kept alive and reused across queries, depths and runs.
+    HTTP/2 multiplexing is used when the optional `h2` package is installed.
+    """
+
+    def __init__(self, pool_size: int = None, timeout: float = None,
+                 connect_timeout: float = None, http2: bool = None):
+        import httpx
+
+        pool_size = pool_size or Config.PERPLEXITY_POOL_SIZE
+        if http2 is None:
+            http2 = Config.PERPLEXITY_HTTP2
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self._client = httpx.Client(
+            http2=self.http2,
+            timeout=httpx.Timeout(timeout or Config.PERPLEXITY_TIMEOUT,
+                                  connect=connect_timeout or Config.PERPLEXITY_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=pool_size,
+                                max_keepalive_connections=pool_size,
+                                keepalive_expiry=Config.PERPLEXITY_KEEPALIVE_EXPIRY),
+            headers={"Content-Type": "application/json"}
+        )
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._connections = 0
+        self._tls_handshakes = 0
+
+    def _trace(self, event_name, info):
+        """Count new connections via httpcore's trace extension."""
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._connections += 1
+        elif event_name == "connection.start_tls.complete":
+            with self._lock:
+                self._tls_handshakes += 1
+
+    def post(self, url: str, payload: dict) -> dict:
+        """POST a JSON payload and return the decoded JSON response."""
+        with self._lock:
+            self._requests += 1
+        response = self._client.post(
+            url, json=payload,
+            headers={"Authorization": f"Bearer {Config.PERPLEXITY_API_KEY}"},
+            extensions={"trace": self._trace}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def stats(self) -> Dict[str, int]:
+        """Connection reuse counters since the client was created."""
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "connections_opened": self._connections,
+                "tls_handshakes": self._tls_handshakes,
+                "reused_requests": max(0, self._requests - self._connections),
+                "http2": self.http2,
+            }
+
+    def close(self):
+        self._client.close()
+
+
+_search_client = None
+_search_client_lock = threading.Lock()
+
+
+def get_search_client() -> SearchClient:
+    """Return the process-wide Perplexity client, creating it on first use."""
+    global _search_client
+    if _search_client is None:
+        with _search_client_lock:
+            if _search_client is None:
+                _search_client = SearchClient()
+    return _search_client
+
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> DiskCache:
+    """Return the process-wide search result cache, opening it on first use."""
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = DiskCache(Config.SEARCH_CACHE_PATH,
+                                          max_entries=Config.SEARCH_CACHE_MAX_ENTRIES)
+    return _search_cache
+
+
+def search_cache_key(query: str, model: str = PERPLEXITY_MODEL,
+                     recency: str = SEARCH_RECENCY_FILTER) -> str:
+    """Cache key from the normalized query text, model and recency filter."""
+    normalized = re.sub(r"\s+", " ", query.strip().lower())
+    return hashlib.sha256(json.dumps([normalized, model, recency]).encode()).hexdigest()
+
+
+def search_recording_key(query: str) -> str:
+    """Response cache key under which record mode stores a search for replay."""
+    return response_cache_key("perplexity", PERPLEXITY_MODEL, search_cache_key(query), None, None)
 
 
 def perplexity_search(query: str, max_results: int = 5) -> List[Dict[str, str]]:
     """Execute a single search query and return structured results."""
+    with tracing.span("search", "perplexity", query=query[:100]):
+        return _perplexity_search(query, max_results)
+
+
+def _perplexity_request(query: str) -> Tuple[str, List[str]]:
+    """One Perplexity API call; returns (content, citations) and records its usage."""
+    data = get_search_client().post(PERPLEXITY_URL, {
+        "model": PERPLEXITY_MODEL,
+        "messages": [
+            {"role": "system", "content": "You are a web search assistant. Provide factual information with sources."},
+            {"role": "user", "content": query}
+        ],
+        "temperature": 0.2,
+        "max_tokens": 1000,
+        "return_citations": True,
+        "search_recency_filter": SEARCH_RECENCY_FILTER
+    })
+    content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+    citations = data.get("citations", [])
+    usage = data.get("usage") or {}
+    accounting.record("perplexity",
+                      usage.get("prompt_tokens", accounting.count_tokens(query)),
+                      usage.get("completion_tokens", accounting.count_tokens(content)))
+    return content, citations
+
+
+def _perplexity_search(query: str, max_results: int) -> List[Dict[str, str]]:
+    start = time.perf_counter()
     try:
-        print(f"  Calling Perplexity API for: {query[:50]}...")
-        response = requests.post(
-            "https://api.perplexity.ai/chat/completions",
-            headers={
-                "Authorization": f"Bearer {Config.PERPLEXITY_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "sonar-pro",
-                "messages": [
-                    {"role": "system", "content": "You are a web search assistant. Provide factual information with sources."},
-                    {"role": "user", "content": query}
-                ],
-                "temperature": 0.2,
-                "max_tokens": 1000,
-                "return_citations": True,
-                "search_recency_filter": "month"
-            },
-            timeout=30
-        )
-        response.raise_for_status()
-        data = response.json()
+        key = search_cache_key(query)
+        mode = Config.RESPONSE_CACHE_MODE
+        cached = None
+        if mode == "replay":
+            # Recordings live in the response cache, out of reach of the search cache's TTL and eviction
+            cached = models.cache.get(search_recording_key(query))
+        elif Config.SEARCH_CACHE_ENABLED and mode != "record":
+            cached = get_search_cache().get(key)
         
-        content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-        citations = data.get("citations", [])
+        if cached:
+            print(f"  Cache hit for: {query[:50]}")
+            content, citations = cached["content"], cached["citations"]
+            accounting.record("perplexity", 0, 0, cached=True)
+        elif mode == "replay":
+            raise LookupError(f"No recorded search result for: {query[:50]}")
+        else:
+            print(f"  Calling Perplexity API for: {query[:50]}...")
+            content, citations = resilience.call("perplexity", lambda: _perplexity_request(query),
+                                                 tokens=lambda: accounting.count_tokens(query) + 1000)
+            
+            # Only successful, non-empty responses are cached; errors raise above
+            if Config.SEARCH_CACHE_ENABLED and (content or citations):
+                ttl = min(RECENCY_TTL.get(SEARCH_RECENCY_FILTER, Config.SEARCH_CACHE_TTL),
+                          Config.SEARCH_CACHE_TTL)
+                get_search_cache().set(key, {"content": content, "citations": citations}, ttl=ttl)
+            if mode == "record" and (content or citations):
+                models.cache.set(search_recording_key(query), {"content": content, "citations": citations})
         
         print(f"  Perplexity returned {len(citations)} citations, content length: {len(content)}")
+        tracing.annotate(cached=bool(cached), response_chars=len(content), citations=len(citations))
         
         # Structure results with URL, title, and snippet
         results = [
@@ -46,12 +204,17 @@ def perplexity_search(query: str, max_results: int = 5) -> List[Dict[str, str]]:
             results = [{"url": "perplexity_response", "title": "Search Result", "snippet": content[:500]}]
         
         print(f"  Returning {len(results)} results")
+        events.emit("search_call", query=query, cached=bool(cached), ok=True, results=len(results),
+                    seconds=round(time.perf_counter() - start, 3))
         return results
         
     except Exception as e:
         print(f"  Perplexity API error: {e}")
         import traceback
         traceback.print_exc()
+        tracing.annotate(error=str(e))
+        events.emit("search_call", query=query, cached=False, ok=False, error=str(e),
+                    seconds=round(time.perf_counter() - start, 3))
         return [{"url": "error", "title": "Search Error", "snippet": str(e)}]
 
 
@@ -69,8 +232,78 @@ def format_search_results(results: List[Dict[str, str]]) -> str:
 
 
 def batch_search(queries: List[str], max_results_per_query: int = 5) -> Dict[str, List[Dict]]:
-    """Execute multiple queries and aggregate results."""
+    """Execute multiple queries concurrently and aggregate results in query order."""
+    unique_queries = list(dict.fromkeys(queries))
+    if not unique_queries:
+        return {}
+    
+    workers = max(1, min(len(unique_queries), Config.PERPLEXITY_CONCURRENCY))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search") as pool:
+        # Each worker runs in a copy of the caller's context so per-run accounting follows it
+        futures = [
+            pool.submit(contextvars.copy_context().run, perplexity_search, q, max_results_per_query)
+            for q in unique_queries
+        ]
+    
     all_results = {}
-    for query in queries:
-        all_results[query] = perplexity_search(query, max_results=max_results_per_query)
+    for query, future in zip(unique_queries, futures):
+        try:
+            all_results[query] = future.result()
+        except Exception as e:
+            all_results[query] = [{"url": "error", "title": "Search Error", "snippet": str(e)}]
     return all_results
+
+
+
+QUERY_STOPWORDS = {
+    "a", "an", "and", "the", "of", "in", "on", "for", "to", "with", "by", "at", "from",
+    "or", "not", "about", "is", "was", "his", "her", "their", "vs", "v",
+}
+
+
+def query_tokens(query: str, target: str = "") -> frozenset:
+    """Content tokens of a query, ignoring operators, stopwords and the target's name."""
+    text = re.sub(r"\b(site|intitle|inurl|filetype):\S+", " ", query.lower())
+    ignored = QUERY_STOPWORDS | set(re.findall(r"\w+", target.lower()))
+    tokens = set()
+    for token in re.findall(r"\w+", text):
+        if token in ignored:
+            continue
+        # Light plural stemming so "lawsuit" and "lawsuits" match
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.add(token)
+    return frozenset(tokens)
+
+
+def is_near_duplicate(a: frozenset, b: frozenset, threshold: float = 0.8) -> bool:
+    """Token-set similarity: high Jaccard, or one query is a 3+ term query plus one extra term.
+
+    Short queries are exempt from the extra-term rule: "fraud" and "fraud
+    verdict" ask different things, "SEC fraud charges" and "SEC fraud charges
+    against" do not.
+    """
+    if not a or not b:
+        return a == b
+    shared = len(a & b)
+    union = len(a | b)
+    if shared / union >= threshold:
+        return True
+    smaller = min(len(a), len(b))
+    return smaller >= 3 and shared == smaller and union - shared <= 1
+
+
+def dedupe_queries(candidates: List[str], ledger: List[str], target: str = "",
+                   threshold: float = None) -> Tuple[List[str], List[str]]:
+    """Split candidates into (to_run, skipped) against the queries already executed."""
+    threshold = Config.QUERY_DEDUP_THRESHOLD if threshold is None else threshold
+    seen = [query_tokens(q, target) for q in ledger]
+    to_run, skipped = [], []
+    for query in candidates:
+        tokens = query_tokens(query, target)
+        if any(is_near_duplicate(tokens, other, threshold) for other in seen):
+            skipped.append(query)
+            continue
+        seen.append(tokens)
+        to_run.append(query)
+    return to_run, skipped
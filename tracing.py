@@ -0,0 +1,160 @@
+"""Lightweight span tracing for graph nodes, LLM calls and searches (JSON lines)."""
+import contextlib
+import contextvars
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+_current_tracer = contextvars.ContextVar("tracer", default=None)
+_current_span = contextvars.ContextVar("span", default=None)
+
+
+class Span:
+    """One timed operation; attributes can be added while it is open."""
+
+    def __init__(self, span_id: int, parent_id: int, kind: str, name: str, attrs: Dict):
+        self.id = span_id
+        self.parent_id = parent_id
+        self.kind = kind
+        self.name = name
+        self.attrs = dict(attrs)
+        self.start = time.time()
+        self._perf_start = time.perf_counter()
+        self.duration = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> Dict:
+        return {
+            "span_id": self.id, "parent_id": self.parent_id, "kind": self.kind, "name": self.name,
+            "start": self.start, "end": self.start + (self.duration or 0),
+            "duration": self.duration, "thread": threading.current_thread().name, **self.attrs,
+        }
+
+
+class Tracer:
+    """Writes finished spans of one run to a JSON-lines file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w")
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        with self._lock:
+            return next(self._ids)
+
+    def write(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def start(path) -> Tracer:
+    """Create a tracer for the current run and bind it to this context."""
+    tracer = Tracer(path)
+    _current_tracer.set(tracer)
+    _current_span.set(None)
+    return tracer
+
+
+@contextlib.contextmanager
+def span(kind: str, name: str, **attrs):
+    """Record a span around the block; a no-op outside a traced run."""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield None
+        return
+    parent = _current_span.get()
+    current = Span(tracer.next_id(), parent.id if parent else None, kind, name, attrs)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        current.duration = time.perf_counter() - current._perf_start
+        _current_span.reset(token)
+        tracer.write(current)
+
+
+def annotate(**attrs):
+    """Set attributes on the innermost open span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attrs)
+
+
+def load_spans(path) -> List[Dict]:
+    try:
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except (OSError, json.JSONDecodeError):
+        return []
+
+
+def summarize(spans: List[Dict]) -> Dict:
+    """Wall-clock breakdown: critical path through the nodes and totals per provider.
+
+    Node spans that overlap in time ran in parallel; only the longest of each
+    overlapping group lies on the critical path.
+    """
+    nodes = sorted((s for s in spans if s["kind"] == "node"), key=lambda s: s["start"])
+    groups = []
+    for node in nodes:
+        if groups and node["start"] < max(s["end"] for s in groups[-1]):
+            groups[-1].append(node)
+        else:
+            groups.append([node])
+
+    children = defaultdict(list)
+    for s in spans:
+        if s["kind"] != "node":
+            children[s["parent_id"]].append(s)
+
+    critical_path = []
+    for group in groups:
+        longest = max(group, key=lambda s: s["duration"])
+        # Wall time each provider occupied inside the node (concurrent calls overlap)
+        by_name = defaultdict(list)
+        for child in children[longest["span_id"]]:
+            by_name[child["name"]].append(child)
+        calls = {name: {"count": len(same),
+                        "seconds": max(c["end"] for c in same) - min(c["start"] for c in same)}
+                 for name, same in by_name.items()}
+        critical_path.append({
+            "node": longest["name"], "depth": longest.get("depth"),
+            "seconds": longest["duration"], "calls": calls,
+            "parallel": [s["name"] for s in group if s is not longest],
+        })
+
+    providers = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "input_tokens": 0,
+                                     "output_tokens": 0, "response_chars": 0,
+                                     "retries": 0, "errors": 0})
+    for s in spans:
+        if s["kind"] in ("llm", "search"):
+            row = providers[s["name"]]
+            row["calls"] += 1
+            row["seconds"] += s["duration"]
+            row["input_tokens"] += s.get("input_tokens", 0)
+            row["output_tokens"] += s.get("output_tokens", 0)
+            row["response_chars"] += s.get("response_chars", 0)
+            row["retries"] += s.get("retries", 0)
+            row["errors"] += 1 if s.get("error") else 0
+
+    wall = (max(s["end"] for s in spans) - min(s["start"] for s in spans)) if spans else 0.0
+    return {"wall_seconds": wall, "critical_path": critical_path, "providers": dict(providers)}